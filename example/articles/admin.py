@@ -1,10 +1,22 @@
 from django.contrib import admin
 from fperms.admin import PermModelAdmin
 
-from articles.models import Article
+from articles.models import Article, Revision, Tag
 
 
 @admin.register(Article)
 class ArticleAdmin(PermModelAdmin):
 
     perms_per_instance = True
+
+
+@admin.register(Revision)
+class RevisionAdmin(PermModelAdmin):
+
+    perms_per_instance = True
+
+
+@admin.register(Tag)
+class TagAdmin(PermModelAdmin):
+
+    perms_per_instance = True
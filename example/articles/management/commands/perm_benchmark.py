@@ -0,0 +1,204 @@
+import json
+import statistics
+import time
+
+import django
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+import fperms
+from fperms import enums, get_perm_model
+from fperms.backends import PermBackend
+from fperms.base import parse_perm
+from fperms.cache import bump_generation, perm_codename_registry, perm_lru_cache
+from fperms.conf import settings as perm_settings
+from fperms.models import EffectivePerm
+from fperms.utils import get_content_type
+
+from articles.models import Article
+
+
+Perm = get_perm_model()
+User = get_user_model()
+
+SEED_PREFIX = 'fperms-benchmark-'
+BATCH_SIZE = 500
+
+
+class Command(BaseCommand):
+
+    help = 'Measures wall time and query counts of the fperms permission checks on seeded data'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=100, help='number of users to seed')
+        parser.add_argument('--groups', type=int, default=10, help='number of groups to seed')
+        parser.add_argument('--objects', type=int, default=1000, help='number of articles to seed')
+        parser.add_argument('--perms', type=int, default=100, help='number of object perms to seed')
+        parser.add_argument('--repeat', type=int, default=20, help='number of runs of every check')
+        parser.add_argument('--output', help='file to write the JSON results to, stdout by default')
+
+    def bulk_create(self, model, objs, **lookup):
+        # primary keys are not set by bulk_create on every database, the created objects are fetched back
+        model._default_manager.bulk_create(objs, batch_size=BATCH_SIZE)
+        return list(model._default_manager.filter(**lookup).order_by('pk'))
+
+    def seed(self, users, groups, objects, perms):
+        # seed the data in bulk, returns the user whose permissions are checked and the checked articles
+        # grants are created via the through models, so the effective perms table is rebuilt afterwards
+        content_type = get_content_type(Article)
+        articles = self.bulk_create(
+            Article,
+            (Article(name='{}{}'.format(SEED_PREFIX, i), text='text') for i in range(max(objects, 3))),
+            name__startswith=SEED_PREFIX,
+        )
+        groups = self.bulk_create(
+            Group,
+            (Group(name='{}{}'.format(SEED_PREFIX, i)) for i in range(max(groups, 1))),
+            name__startswith=SEED_PREFIX,
+        )
+        users = self.bulk_create(
+            User,
+            (User(username='{}{}'.format(SEED_PREFIX, i)) for i in range(max(users, 1))),
+            username__startswith=SEED_PREFIX,
+        )
+        object_perms = self.bulk_create(
+            Perm,
+            (
+                Perm(type=enums.PERM_TYPE_OBJECT, codename='change', content_type=content_type, object_id=article.pk)
+                for article in articles[3:perms + 3]
+            ),
+            type=enums.PERM_TYPE_OBJECT,
+            content_type=content_type,
+            object_id__in=[article.pk for article in articles[3:perms + 3]],
+        )
+
+        # the first article is granted directly, the second via a group and the third via the wildcard perm
+        direct_article, group_article, wildcard_article = articles[:3]
+        user = users[0]
+        user.perms.add_perm(
+            Perm.objects.create(codename='export'),
+            Perm.objects.create_from_str('model.articles.Article.change')[0],
+            Perm.objects.create_from_str('field.articles.Article.name.add')[0],
+            Perm.objects.create_from_str('object.articles.Article.change', direct_article)[0],
+            Perm.objects.create_from_str('object.articles.Article.*', wildcard_article)[0],
+        )
+        groups[0].perms.add_perm(Perm.objects.create_from_str('object.articles.Article.change', group_article)[0])
+
+        # object perms are spread over groups and users, the checked user is a member of all groups
+        user_perms = Perm.users.through
+        group_perms = Perm.groups.through
+        user_groups = User.groups.through
+        group_perms.objects.bulk_create(
+            (group_perms(perm_id=perm.pk, group_id=groups[i % len(groups)].pk) for i, perm in enumerate(object_perms)),
+            batch_size=BATCH_SIZE,
+        )
+        user_perms.objects.bulk_create(
+            (user_perms(perm_id=perm.pk, user_id=users[i % len(users)].pk) for i, perm in enumerate(object_perms)),
+            batch_size=BATCH_SIZE,
+        )
+        user_groups.objects.bulk_create(
+            [user_groups(user_id=user.pk, group_id=group.pk) for group in groups[1:]] + [
+                user_groups(user_id=other.pk, group_id=groups[i % len(groups)].pk) for i, other in enumerate(users[1:])
+            ],
+            batch_size=BATCH_SIZE,
+        )
+        user.groups.add(groups[0])
+
+        if perm_settings.PERM_EFFECTIVE_PERMS:
+            EffectivePerm.objects.rebuild()
+        bump_generation()
+
+        return user, direct_article, group_article, wildcard_article
+
+    def get_checks(self, direct_article, group_article, wildcard_article):
+        # permission checks of a user on the fperms hot paths, by name
+        backend = PermBackend()
+        model_admin = admin.site._registry[Article]
+        request_factory = RequestFactory()
+
+        def changelist(user):
+            request = request_factory.get('/admin/articles/article/')
+            request.user = user
+            return len(model_admin.get_changelist_instance(request).result_list)
+
+        return [
+            ('generic', lambda user: user.perms.has_perm('generic.export')),
+            ('model', lambda user: user.perms.has_perm('model.articles.Article.change')),
+            ('object', lambda user: user.perms.has_perm('object.articles.Article.change', direct_article)),
+            ('field', lambda user: user.perms.has_perm('field.articles.Article.name.add')),
+            ('wildcard fallback', lambda user: user.perms.has_perm(
+                'object.articles.Article.change', wildcard_article,
+            )),
+            ('group inherited', lambda user: user.perms.has_perm('object.articles.Article.change', group_article)),
+            ('change list', changelist),
+            ('module perms', lambda user: backend.has_module_perms(user, 'articles')),
+        ]
+
+    def clear_caches(self):
+        # drop all in-process and shared caches, as in a freshly started process
+        parse_perm.cache_clear()
+        perm_lru_cache.clear()
+        perm_codename_registry.clear()
+        bump_generation()
+
+    def measure(self, check, user):
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            check(user)
+            duration = time.perf_counter() - start
+        return duration, len(queries)
+
+    def summarize(self, runs):
+        durations = [duration * 1000 for duration, queries in runs]
+        return {
+            'queries': max(queries for duration, queries in runs),
+            'min_ms': min(durations),
+            'median_ms': statistics.median(durations),
+            'mean_ms': statistics.mean(durations),
+        }
+
+    def benchmark(self, user_pk, checks, repeat):
+        results = []
+        for name, check in checks:
+            cold_runs, warm_runs = [], []
+            for _ in range(repeat):
+                # cold runs check a fresh user instance after clearing the caches, warm runs repeat the check
+                self.clear_caches()
+                user = User.objects.get(pk=user_pk)
+                cold_runs.append(self.measure(check, user))
+                warm_runs.append(self.measure(check, user))
+            results.append({'name': name, 'cold': self.summarize(cold_runs), 'warm': self.summarize(warm_runs)})
+        return results
+
+    def handle(self, *args, **options):
+        config = {key: options[key] for key in ('users', 'groups', 'objects', 'perms', 'repeat')}
+        # seeded data is never committed
+        with transaction.atomic():
+            user, *articles = self.seed(
+                options['users'], options['groups'], options['objects'], options['perms'],
+            )
+            results = self.benchmark(user.pk, self.get_checks(*articles), max(options['repeat'], 1))
+            transaction.set_rollback(True)
+        self.clear_caches()
+
+        output = json.dumps({
+            'config': config,
+            'environment': {
+                'database': connection.vendor,
+                'django': django.get_version(),
+                'fperms': fperms.__version__,
+                'perm_cache': perm_settings.PERM_CACHE,
+                'effective_perms': perm_settings.PERM_EFFECTIVE_PERMS,
+            },
+            'results': results,
+        }, indent=2)
+        if options['output']:
+            with open(options['output'], 'w') as output_file:
+                output_file.write(output)
+        else:
+            self.stdout.write(output)
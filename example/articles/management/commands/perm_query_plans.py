@@ -0,0 +1,89 @@
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+
+from fperms import enums, get_perm_model
+from fperms.utils import get_content_type, get_resolve_kwargs
+
+from articles.models import Article
+
+
+Perm = get_perm_model()
+User = get_user_model()
+
+
+class Command(BaseCommand):
+
+    help = 'Prints query plans of the fperms hot paths with and without the perm indexes'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--user', type=int, help='pk of the user to check, the first user by default')
+
+    def get_querysets(self, user):
+        # querysets issued by fperms on its hot paths
+        content_type = get_content_type(Article)
+        article_pks = list(Article.objects.values_list('pk', flat=True)[:50])
+        perm_kwargs = dict(
+            type=enums.PERM_TYPE_MODEL,
+            codename=enums.PERM_CODENAME_CHANGE,
+            content_type_id=content_type.pk,
+            object_id=None,
+            field_name=None,
+        )
+
+        querysets = [
+            ('resolve model perm', Perm.objects.filter(**get_resolve_kwargs(perm_kwargs))),
+            ('model perms of a content type', Perm.objects.filter(
+                content_type=content_type,
+                object_id__isnull=True,
+                codename__in=(enums.PERM_CODENAME_CHANGE, enums.PERM_CODENAME_WILDCARD),
+            )),
+            ('effective perms', Perm.objects.for_user(user)),
+            ('filter objects', Perm.objects.filter_objects(Article.objects.all(), user, enums.PERM_CODENAME_CHANGE)),
+        ]
+        if article_pks:
+            querysets.append(('prefetch object perms', Perm.objects.filter(
+                type=enums.PERM_TYPE_OBJECT,
+                content_type=content_type,
+                object_id__in=article_pks,
+            )))
+        return querysets
+
+    def explain(self, queryset, title):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            # the title keeps database drivers from reusing a plan prepared before the indexes were dropped
+            cursor.execute('/* {} */ {} {}'.format(title, connection.ops.explain_query_prefix(), sql), params)
+            return [' '.join(str(column) for column in row) for row in cursor.fetchall()]
+
+    def print_plans(self, title, querysets):
+        self.stdout.write(self.style.MIGRATE_HEADING(title))
+        for name, queryset in querysets:
+            self.stdout.write(self.style.MIGRATE_LABEL('  {}'.format(name)))
+            for line in self.explain(queryset, title):
+                self.stdout.write('    {}'.format(line))
+
+    def handle(self, *args, **options):
+        if options['user']:
+            user = User.objects.get(pk=options['user'])
+        else:
+            user = User.objects.order_by('pk').first()
+        if user is None:
+            self.stderr.write('There is no user to check permissions of.')
+            return
+
+        querysets = self.get_querysets(user)
+        self.print_plans('With perm indexes', querysets)
+
+        if not connection.features.can_rollback_ddl:
+            self.stderr.write('Plans without the indexes require a database able to roll back DDL.')
+            return
+
+        # drop the indexes temporarily, the transaction is always rolled back
+        with transaction.atomic():
+            schema_editor = connection.schema_editor()
+            for index in Perm._meta.indexes:
+                with connection.cursor() as cursor:
+                    cursor.execute(str(index.remove_sql(Perm, schema_editor)))
+            self.print_plans('Without perm indexes', querysets)
+            transaction.set_rollback(True)
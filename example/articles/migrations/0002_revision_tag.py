@@ -0,0 +1,28 @@
+from django.db import migrations, models
+import uuid
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('articles', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Revision',
+            fields=[
+                ('id', models.UUIDField(
+                    default=uuid.uuid4, editable=False, primary_key=True, serialize=False, verbose_name='id'
+                )),
+                ('text', models.TextField(verbose_name='text')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Tag',
+            fields=[
+                ('slug', models.SlugField(max_length=60, primary_key=True, serialize=False, verbose_name='slug')),
+                ('name', models.CharField(max_length=60, verbose_name='name')),
+            ],
+        ),
+    ]
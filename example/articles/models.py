@@ -1,10 +1,38 @@
+import uuid
+
 from django.db import models
 
+from fperms.managers import PermQuerySet
+
 
 class Article(models.Model):
 
     name = models.CharField(verbose_name='name', max_length=60)
     text = models.TextField(verbose_name='text')
 
+    objects = PermQuerySet.as_manager()
+
+    def __str__(self):
+        return self.name
+
+
+class Revision(models.Model):
+
+    id = models.UUIDField(verbose_name='id', primary_key=True, default=uuid.uuid4, editable=False)
+    text = models.TextField(verbose_name='text')
+
+    objects = PermQuerySet.as_manager()
+
+    def __str__(self):
+        return str(self.id)
+
+
+class Tag(models.Model):
+
+    slug = models.SlugField(verbose_name='slug', max_length=60, primary_key=True)
+    name = models.CharField(verbose_name='name', max_length=60)
+
+    objects = PermQuerySet.as_manager()
+
     def __str__(self):
         return self.name
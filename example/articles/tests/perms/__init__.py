@@ -2,3 +2,21 @@ from .generic import *
 from .model import *
 from .object import *
 from .field import *
+from .field_perms import *
+from .cache import *
+from .shared_cache import *
+from .batch import *
+from .queryset import *
+from .prefetch import *
+from .parse import *
+from .lru import *
+from .resolve import *
+from .object_id import *
+from .effective import *
+from .indexes import *
+from .backend import *
+from .instrumentation import *
+from .bulk import *
+from .asynchronous import *
+from .middleware import *
+from .model_admin import *
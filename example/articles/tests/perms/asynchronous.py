@@ -0,0 +1,98 @@
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+
+from fperms import enums, get_perm_model
+from fperms.backends import PermBackend
+from fperms.utils import run_sync
+
+from .base import ArticleGroupPermTestCase
+from .factories import ArticleFactory
+
+
+Perm = get_perm_model()
+User = get_user_model()
+
+
+class ArticleAsyncPermTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.article = ArticleFactory()
+        self.export_perm = Perm.objects.create(codename='export')
+        self.change_perm = Perm.objects.create_from_str('object.articles.Article.change', obj=self.article)[0]
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm(self.change_perm)
+        self.user = User.objects.get(pk=self.user.pk)
+
+    @contextmanager
+    def assertNoQueries(self):
+        # assertNumQueries connects to the database, which is not allowed in async code
+        queries = []
+
+        def execute_wrapper(execute, sql, params, many, context):
+            queries.append(sql)
+            return execute(sql, params, many, context)
+
+        with connection.execute_wrapper(execute_wrapper):
+            yield
+        self.assertEqual(queries, [])
+
+    async def test_ahas_perm(self):
+        self.assertTrue(await self.user.perms.ahas_perm('object.articles.Article.change', self.article))
+        self.assertFalse(await self.user.perms.ahas_perm('generic.export'))
+        self.assertFalse(await self.user.perms.ahas_perm('generic.import'))
+
+    async def test_ahas_perm_cached(self):
+        await self.user.perms.aload_perms()
+        await self.user.perms.ahas_perm('object.articles.Article.change', self.article)
+        # answered in the event loop, without running has_perm in a thread
+        self.assertTrue(self.user.perms._has_cached_perm('object.articles.Article.change', self.article))
+
+        with self.assertNoQueries():
+            self.assertTrue(await self.user.perms.ahas_perm('object.articles.Article.change', self.article))
+            self.assertTrue(await self.user.perms.ahas_perm(self.change_perm))
+            self.assertFalse(await self.user.perms.ahas_perm(self.export_perm))
+
+    async def test_ahas_perms(self):
+        perms = ['object.articles.Article.change', 'generic.export']
+
+        self.assertFalse(await self.user.perms.ahas_perms(perms, self.article))
+        self.assertTrue(await self.user.perms.ahas_perms(perms, self.article, mode=enums.HAS_PERMS_MODE_ANY))
+        with self.assertNoQueries():
+            self.assertEqual(await self.user.perms.ahas_perms(perms, self.article, mode=enums.HAS_PERMS_MODE_MAP), {
+                'object.articles.Article.change': True,
+                'generic.export': False,
+            })
+
+    async def test_ahas_perms_generator(self):
+        perms = ['object.articles.Article.change', 'generic.export']
+
+        self.assertFalse(await self.user.perms.ahas_perms((perm for perm in perms), self.article))
+        await self.user.perms.aload_perms()
+        self.assertFalse(await self.user.perms.ahas_perms((perm for perm in perms), self.article))
+
+    async def test_aget_perm(self):
+        self.assertEqual(await self.user.perms.aget_perm('object.articles.Article.change', self.article),
+                         self.change_perm)
+        with self.assertNoQueries():
+            self.assertEqual(await self.user.perms.aget_perm('object.articles.Article.change', self.article),
+                             self.change_perm)
+            with self.assertRaises(Perm.DoesNotExist):
+                await self.user.perms.aget_perm(self.export_perm)
+
+    async def test_aadd_perm(self):
+        await self.user.perms.aadd_perm('generic.export')
+
+        self.assertTrue(await self.user.perms.ahas_perm('generic.export'))
+
+    async def test_backend_ahas_perm(self):
+        await run_sync(Perm.objects.create_from_str, 'model.articles.Article.change')
+        await run_sync(self.group.perms.add_perm, 'model.articles.Article.change')
+        backend = PermBackend()
+
+        self.assertTrue(await backend.ahas_perm(self.user, 'articles.change_article'))
+        with self.assertNoQueries():
+            self.assertTrue(await backend.ahas_perm(self.user, 'articles.change_article'))
+            self.assertFalse(await backend.ahas_perm(self.user, 'articles.delete_article'))
@@ -0,0 +1,210 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.context_processors import PermWrapper
+from django.contrib.contenttypes.models import ContentType
+from django.template import Context, Template
+from django.test import override_settings
+
+from fperms import enums
+from fperms.backends import PermBackend, get_perm_from_permission_codename
+from fperms.cache import PERM_CACHE_MODEL_PERMS_GENERATION_KEY, bump_generation
+from fperms.models import Perm
+
+from .base import ArticleGroupPermTestCase
+from .factories import ArticleFactory
+
+
+User = get_user_model()
+
+
+class ArticlePermBackendTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.backend = PermBackend()
+        self.change_perm = self._create_perm(enums.PERM_CODENAME_CHANGE)
+        self.delete_perm = self._create_perm(enums.PERM_CODENAME_DELETE)
+
+    def _create_perm(self, codename):
+        return Perm.objects.create(
+            type=enums.PERM_TYPE_MODEL,
+            codename=codename,
+            content_type=self._get_content_type(),
+        )
+
+    def _get_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_permissions(self):
+        self.user.perms.add_perm(self.change_perm)
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm(self.delete_perm)
+        user = self._get_user()
+
+        self.assertEqual(self.backend.get_user_permissions(user), {'articles.change_article'})
+        self.assertEqual(self.backend.get_group_permissions(user), {'articles.delete_article'})
+        self.assertEqual(
+            self.backend.get_all_permissions(user),
+            {'articles.change_article', 'articles.delete_article'},
+        )
+
+    def test_non_model_perms_ignored(self):
+        self.user.perms.add(
+            self._create_perm(enums.PERM_CODENAME_WILDCARD),
+            Perm.objects.create(codename='export'),
+        )
+
+        self.assertEqual(self.backend.get_all_permissions(self._get_user()), set())
+
+    def test_superuser(self):
+        self.user.is_superuser = True
+
+        self.assertEqual(
+            self.backend.get_all_permissions(self.user),
+            {'articles.change_article', 'articles.delete_article'},
+        )
+
+    def test_inactive_user(self):
+        self.user.perms.add_perm(self.change_perm)
+        self.user.is_active = False
+
+        self.assertEqual(self.backend.get_all_permissions(self.user), set())
+
+    def test_has_perm_cached(self):
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm(self.change_perm)
+        user = self._get_user()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(self.backend.has_perm(user, 'articles.change_article'))
+            self.assertFalse(self.backend.has_perm(user, 'articles.delete_article'))
+            self.assertTrue(self.backend.has_perm(user, 'articles.change_article'))
+
+    def test_template_perms(self):
+        self.user.perms.add_perm(self.change_perm)
+        user = self._get_user()
+        # permissions of ModelBackend are loaded by its own query
+        user.get_all_permissions()
+        template = Template('{{ perms.articles.change_article }} {{ perms.articles.delete_article }}')
+
+        with self.assertNumQueries(0):
+            self.assertEqual(template.render(Context({'perms': PermWrapper(user)})), 'True False')
+
+    def test_has_module_perms(self):
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm(self.change_perm)
+        user = self._get_user()
+
+        with self.assertNumQueries(1):
+            self.assertIs(self.backend.has_module_perms(user, 'articles'), True)
+            self.assertIs(self.backend.has_module_perms(user, 'auth'), False)
+            self.assertIs(self.backend.has_module_perms(user, 'articles'), True)
+
+    def test_has_module_perms_inactive_user(self):
+        self.user.perms.add_perm(self.change_perm)
+        self.user.is_active = False
+
+        self.assertIs(self.backend.has_module_perms(self.user, 'articles'), False)
+
+
+class ArticlePermCodenameTestCase(ArticleGroupPermTestCase):
+
+    def _create_perm(self, codename, content_type=None):
+        return Perm.objects.create(
+            type=enums.PERM_TYPE_MODEL,
+            codename=codename,
+            content_type=content_type or self._get_content_type(),
+        )
+
+    def test_get_perm_from_permission_codename(self):
+        perm = self._create_perm(enums.PERM_CODENAME_CHANGE)
+
+        self.assertEqual(get_perm_from_permission_codename('articles.change_article'), perm)
+        with self.assertNumQueries(0):
+            self.assertEqual(get_perm_from_permission_codename('articles.change_article'), perm)
+            with self.assertRaises(Perm.DoesNotExist):
+                get_perm_from_permission_codename('articles.delete_article')
+
+    def test_underscores(self):
+        content_type = ContentType.objects.create(app_label='articles', model='article_revision')
+        perm = self._create_perm('view_all', content_type)
+
+        self.assertEqual(get_perm_from_permission_codename('articles.view_all_article_revision'), perm)
+
+    def test_refreshed_on_perm_change(self):
+        with self.assertRaises(Perm.DoesNotExist):
+            get_perm_from_permission_codename('articles.change_article')
+
+        perm = self._create_perm(enums.PERM_CODENAME_CHANGE)
+
+        self.assertEqual(get_perm_from_permission_codename('articles.change_article'), perm)
+
+        perm.delete()
+
+        with self.assertRaises(Perm.DoesNotExist):
+            get_perm_from_permission_codename('articles.change_article')
+
+    def test_not_refreshed_on_object_perm_change(self):
+        self._create_perm(enums.PERM_CODENAME_CHANGE)
+        get_perm_from_permission_codename('articles.change_article')
+
+        Perm.objects.create_from_str('object.articles.Article.change', ArticleFactory())
+        Perm.objects.create_from_str('field.articles.Article.name.change')
+
+        with self.assertNumQueries(0):
+            get_perm_from_permission_codename('articles.change_article')
+
+    @override_settings(PERM_CACHE='default')
+    def test_refreshed_on_generation_change(self):
+        perm = self._create_perm(enums.PERM_CODENAME_CHANGE)
+        with mock.patch('fperms.cache.time.monotonic', return_value=1000):
+            self.assertEqual(get_perm_from_permission_codename('articles.change_article'), perm)
+
+        # e.g. a model perm saved in another process, no signal is sent in this one
+        bump_generation(PERM_CACHE_MODEL_PERMS_GENERATION_KEY)
+        with mock.patch('fperms.cache.time.monotonic', return_value=1030):
+            # the generation is checked at most once per timeout
+            with self.assertNumQueries(0):
+                self.assertEqual(get_perm_from_permission_codename('articles.change_article'), perm)
+        with mock.patch('fperms.cache.time.monotonic', return_value=1061):
+            with self.assertNumQueries(1):
+                self.assertEqual(get_perm_from_permission_codename('articles.change_article'), perm)
+            with self.assertNumQueries(0):
+                self.assertEqual(get_perm_from_permission_codename('articles.change_article'), perm)
+
+    @override_settings(PERM_CACHE='default')
+    def test_not_refreshed_without_generation_change(self):
+        self._create_perm(enums.PERM_CODENAME_CHANGE)
+        with mock.patch('fperms.cache.time.monotonic', return_value=1000):
+            get_perm_from_permission_codename('articles.change_article')
+        with mock.patch('fperms.cache.time.monotonic', return_value=1061):
+            with self.assertNumQueries(0):
+                get_perm_from_permission_codename('articles.change_article')
+
+    def test_expired(self):
+        with mock.patch('fperms.cache.time.monotonic', return_value=1000):
+            with self.assertRaises(Perm.DoesNotExist):
+                get_perm_from_permission_codename('articles.change_article')
+
+        # e.g. a model perm saved in another process, without the shared cache the registry expires
+        Perm.objects.bulk_create([Perm(
+            type=enums.PERM_TYPE_MODEL,
+            codename=enums.PERM_CODENAME_CHANGE,
+            content_type=self._get_content_type(),
+        )])
+        with mock.patch('fperms.cache.time.monotonic', return_value=1030):
+            with self.assertRaises(Perm.DoesNotExist):
+                get_perm_from_permission_codename('articles.change_article')
+        with mock.patch('fperms.cache.time.monotonic', return_value=1061):
+            self.assertEqual(get_perm_from_permission_codename('articles.change_article'), Perm.objects.get())
+
+    def test_has_perm_with_obj(self):
+        article = ArticleFactory()
+        perm = self._create_perm(enums.PERM_CODENAME_CHANGE)
+        self.user.perms.add_perm(perm)
+        user = User.objects.get(pk=self.user.pk)
+        PermBackend().has_perm(user, 'articles.change_article', article)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(PermBackend().has_perm(user, 'articles.change_article', article))
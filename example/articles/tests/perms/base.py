@@ -1,6 +1,8 @@
 from django.contrib.contenttypes.models import ContentType
 from django.test import TestCase, Client
 
+from fperms.cache import perm_codename_registry, perm_lru_cache
+
 from articles.models import Article
 
 from .factories import UserFactory, GroupFactory
@@ -9,6 +11,9 @@ from .factories import UserFactory, GroupFactory
 class ArticleTestCase(TestCase):
 
     def setUp(self):
+        # perms resolved in previous tests are rolled back without any signal
+        perm_lru_cache.clear()
+        perm_codename_registry.clear()
         self.user = UserFactory()
         self.client = Client()
 
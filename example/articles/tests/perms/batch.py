@@ -0,0 +1,137 @@
+from django.contrib.auth import get_user_model
+from django.test import override_settings
+
+from fperms import enums
+from fperms.models import Perm
+
+from .base import ArticleUserPermTestCase, ArticleGroupPermTestCase
+from .factories import ArticleFactory
+
+
+User = get_user_model()
+
+
+class BatchPermTestCaseMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.article = ArticleFactory()
+        self.export_perm = Perm.objects.create(
+            codename='export',
+        )
+        self.add_perm = Perm.objects.create(
+            type=enums.PERM_TYPE_MODEL,
+            codename=enums.PERM_CODENAME_ADD,
+            content_type=self._get_content_type(),
+        )
+        self.object_wildcard_perm = Perm.objects.create(
+            type=enums.PERM_TYPE_OBJECT,
+            codename=enums.PERM_CODENAME_WILDCARD,
+            content_object=self.article,
+        )
+
+
+class ArticleUserBatchPermTestCase(BatchPermTestCaseMixin, ArticleUserPermTestCase):
+
+    def test_has_perms_all(self):
+        self.user.perms.add_perm(self.export_perm, self.add_perm)
+
+        self.assertTrue(self.user.perms.has_perms(['generic.export', 'model.articles.Article.add']))
+        self.assertFalse(self.user.perms.has_perms(['generic.export', 'model.articles.Article.delete']))
+
+    def test_has_perms_any(self):
+        self.user.perms.add_perm(self.export_perm)
+
+        self.assertTrue(self.user.perms.has_perms(
+            ['generic.export', 'model.articles.Article.add'], mode=enums.HAS_PERMS_MODE_ANY,
+        ))
+        self.assertFalse(self.user.perms.has_perms(
+            ['generic.import', 'model.articles.Article.add'], mode=enums.HAS_PERMS_MODE_ANY,
+        ))
+
+    def test_has_perms_map(self):
+        self.user.perms.add_perm(self.add_perm)
+
+        self.assertEqual(
+            self.user.perms.has_perms(
+                ['generic.export', 'model.articles.Article.add', self.add_perm], mode=enums.HAS_PERMS_MODE_MAP,
+            ),
+            {'generic.export': False, 'model.articles.Article.add': True, self.add_perm: True},
+        )
+
+    def test_has_object_perms_from_wildcard(self):
+        self.user.perms.add_perm(self.object_wildcard_perm)
+
+        self.assertTrue(self.user.perms.has_perms(
+            ['object.articles.Article.change', 'object.articles.Article.delete'], obj=self.article,
+        ))
+
+    @override_settings(PERM_AUTO_CREATE=True)
+    def test_has_perms_auto_create(self):
+        self.user.perms.add_perm(self.object_wildcard_perm)
+        perms = ['object.articles.Article.change', 'object.articles.Article.delete']
+
+        # the missing perms are created as by ``has_perm``, the wildcard perm does not apply to them anymore
+        self.assertEqual(
+            self.user.perms.has_perms(perms, obj=self.article, mode=enums.HAS_PERMS_MODE_MAP),
+            {perm: self.user.perms.has_perm(perm, obj=self.article) for perm in perms},
+        )
+        self.assertFalse(self.user.perms.has_perms(perms, obj=self.article, mode=enums.HAS_PERMS_MODE_ANY))
+        self.assertEqual(
+            Perm.objects.filter(type=enums.PERM_TYPE_OBJECT, codename__in=['change', 'delete']).count(), 2,
+        )
+
+    def test_has_perms_single_query(self):
+        self.user.perms.add_perm(self.export_perm, self.add_perm)
+        self.user.perms.has_perm(self.export_perm)
+
+        perms = [
+            'generic.export',
+            'model.articles.Article.add',
+            'model.articles.Article.change',
+            'model.articles.Article.delete',
+        ]
+        with self.assertNumQueries(1):
+            self.user.perms.has_perms(perms)
+
+    def test_has_perms_cold_single_query(self):
+        self.user.perms.add_perm(self.export_perm, self.add_perm)
+        user = User.objects.get(pk=self.user.pk)
+
+        # the permissions of the user are loaded along with the existing perms
+        with self.assertNumQueries(1):
+            self.assertTrue(user.perms.has_perms(['generic.export', 'model.articles.Article.add']))
+        with self.assertNumQueries(1):
+            self.assertFalse(user.perms.has_perms(['generic.export', 'model.articles.Article.delete']))
+
+    def test_has_perms_generator(self):
+        self.user.perms.add_perm(self.export_perm)
+
+        self.assertFalse(self.user.perms.has_perms(perm for perm in ['generic.export', 'generic.import']))
+        self.assertTrue(self.user.perms.has_perms(perm for perm in ['generic.export']))
+        self.assertEqual(
+            self.user.perms.has_perms((perm for perm in ['generic.import']), mode=enums.HAS_PERMS_MODE_MAP),
+            {'generic.import': False},
+        )
+
+    def test_has_perms_superuser(self):
+        self.user.is_superuser = True
+
+        self.assertTrue(self.user.perms.has_perms(['generic.whatever', 'model.articles.Article.add']))
+
+    def test_fail_has_perms_invalid_mode(self):
+        with self.assertRaises(ValueError):
+            self.user.perms.has_perms(['generic.export'], mode='foo')
+
+
+class ArticleGroupBatchPermTestCase(BatchPermTestCaseMixin, ArticleGroupPermTestCase):
+
+    def test_has_perms_from_group(self):
+        self.group.perms.add_perm(self.export_perm, self.add_perm)
+
+        self.assertTrue(self.group.perms.has_perms(['generic.export', 'model.articles.Article.add']))
+        self.assertFalse(self.user.perms.has_perms(['generic.export', 'model.articles.Article.add']))
+
+        self.user.groups.add(self.group)
+
+        self.assertTrue(self.user.perms.has_perms(['generic.export', 'model.articles.Article.add']))
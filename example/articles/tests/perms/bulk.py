@@ -0,0 +1,258 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test import RequestFactory, override_settings
+
+from fperms import enums, get_perm_model
+from fperms.models import EffectivePerm
+from fperms.signals import perms_changed
+from fperms.utils import get_perm
+
+from articles.models import Article
+
+from .base import ArticleGroupPermTestCase
+from .factories import ArticleFactory, UserFactory
+
+
+Perm = get_perm_model()
+User = get_user_model()
+
+
+class ArticleBulkPermTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.users = [self.user] + [UserFactory() for _ in range(2)]
+        self.articles = [ArticleFactory() for _ in range(3)]
+        self.export_perm = Perm.objects.create(codename='export')
+        self.change_perm = Perm.objects.create_from_str('model.articles.Article.change')[0]
+        self.object_perms = [
+            Perm.objects.create_from_str('object.articles.Article.change', obj=article)[0]
+            for article in self.articles
+        ]
+
+    def _get_user(self, user):
+        return User.objects.get(pk=user.pk)
+
+    def test_grant(self):
+        with self.assertNumQueries(3):
+            perms = Perm.objects.grant(
+                ['generic.export', 'model.articles.Article.change'], users=self.users, groups=[self.group],
+            )
+
+        self.assertEqual(perms, [self.export_perm, self.change_perm])
+        for user in self.users:
+            self.assertTrue(self._get_user(user).perms.has_perm('generic.export'))
+            self.assertTrue(self._get_user(user).perms.has_perm('model.articles.Article.change'))
+        self.assertEqual(set(self.group.perms.all()), {self.export_perm, self.change_perm})
+
+    def test_grant_objs(self):
+        Perm.objects.grant(['object.articles.Article.change'], users=[user.pk for user in self.users],
+                           objs=self.articles)
+
+        for user in self.users:
+            self.assertEqual(set(user.perms.all()), set(self.object_perms))
+
+    def test_grant_wildcard(self):
+        article = ArticleFactory()
+        wildcard_perm = Perm.objects.create_from_str('object.articles.Article.*', obj=article)[0]
+
+        self.assertEqual(Perm.objects.grant('object.articles.Article.change', users=[self.user], objs=[article]), [
+            wildcard_perm,
+        ])
+
+    def test_grant_existing(self):
+        self.user.perms.add(self.export_perm)
+
+        Perm.objects.grant([self.export_perm], users=[self.user])
+
+        self.assertEqual(list(self.user.perms.all()), [self.export_perm])
+
+    def test_grant_does_not_exist(self):
+        with self.assertRaises(Perm.DoesNotExist):
+            Perm.objects.grant(['generic.export', 'generic.import'], users=[self.user])
+
+        self.assertFalse(self.user.perms.exists())
+
+    def test_grant_clears_cache(self):
+        self.assertFalse(self.user.perms.has_perm(self.export_perm))
+
+        Perm.objects.grant([self.export_perm], users=[self.user])
+
+        self.assertTrue(self.user.perms.has_perm(self.export_perm))
+
+    def test_revoke(self):
+        Perm.objects.grant('object.articles.Article.change', users=self.users, groups=[self.group], objs=self.articles)
+
+        Perm.objects.revoke(['object.articles.Article.change'], users=self.users[1:], groups=[self.group],
+                            objs=self.articles[:2])
+
+        self.assertEqual(set(self.user.perms.all()), set(self.object_perms))
+        self.assertEqual(list(self.users[1].perms.all()), [self.object_perms[2]])
+        self.assertEqual(list(self.group.perms.all()), [self.object_perms[2]])
+
+    def test_single_signal(self):
+        calls = []
+
+        def receiver(sender, **kwargs):
+            calls.append(kwargs['action'])
+
+        perms_changed.connect(receiver)
+        try:
+            Perm.objects.grant([self.export_perm], users=self.users, groups=[self.group])
+            Perm.objects.revoke([self.export_perm], users=self.users, groups=[self.group])
+        finally:
+            perms_changed.disconnect(receiver)
+
+        self.assertEqual(calls, ['grant', 'revoke'])
+
+    @override_settings(PERM_EFFECTIVE_PERMS=True)
+    def test_effective_perms(self):
+        self.user.groups.add(self.group)
+
+        Perm.objects.grant([self.export_perm], users=[self.user], groups=[self.group])
+        Perm.objects.grant([self.export_perm], users=[self.user])
+
+        self.assertEqual(set(EffectivePerm.objects.values_list('user', 'perm', 'group')), {
+            (self.user.pk, self.export_perm.pk, None),
+            (self.user.pk, self.export_perm.pk, self.group.pk),
+        })
+
+        Perm.objects.revoke([self.export_perm], users=[self.user], groups=[self.group])
+
+        self.assertFalse(EffectivePerm.objects.exists())
+
+
+class ArticleBulkCreatePermTestCase(ArticleGroupPermTestCase):
+
+    def test_create_from_str(self):
+        article = ArticleFactory()
+        existing_perm = Perm.objects.create_from_str('object.articles.Article.change', obj=article)[0]
+        perms = [
+            'object.articles.Article.delete',
+            'object.articles.Article.change',
+            'object.articles.Article.delete',
+        ]
+
+        with self.assertNumQueries(5):
+            created_perms = Perm.objects.create_from_str(perms, obj=article, bulk=True)
+
+        self.assertEqual(created_perms[1], existing_perm)
+        self.assertEqual(created_perms[0], created_perms[2])
+        self.assertEqual(created_perms[0].perm_key, Perm.get_perm_key('object.articles.Article.delete', article))
+        self.assertEqual(Perm.objects.count(), 2)
+
+    def test_create_from_str_types(self):
+        perms = ['field.articles.Article.name.change', 'generic.export', 'model.articles.Article.change']
+
+        created_perms = Perm.objects.create_from_str(perms, bulk=True)
+
+        self.assertEqual([perm.type for perm in created_perms], [
+            enums.PERM_TYPE_FIELD, enums.PERM_TYPE_GENERIC, enums.PERM_TYPE_MODEL,
+        ])
+        self.assertEqual(Perm.objects.create_from_str(perms, bulk=True), created_perms)
+
+    def test_create_from_str_evicts_cache(self):
+        with self.assertRaises(Perm.DoesNotExist):
+            get_perm('generic.export')
+
+        perm = Perm.objects.create_from_str('generic.export', bulk=True)[0]
+
+        self.assertEqual(get_perm('generic.export'), perm)
+
+    def test_create_from_str_atomic(self):
+        with self.assertRaises(Exception):
+            Perm.objects.create_from_str(['generic.export', 'model.articles.Foo.change'], bulk=True)
+
+        self.assertFalse(Perm.objects.exists())
+
+
+class ArticleProvisionPermTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.articles = [ArticleFactory() for _ in range(3)]
+
+    def _get_object_perms(self, user):
+        # object pks are stored as text
+        return {(codename, int(object_id)) for codename, object_id in user.perms.values_list('codename', 'object_id')}
+
+    def test_provision_object_perms(self):
+        # lookup, insert and fetch of the perms within a savepoint and insert of the grants
+        with self.assertNumQueries(6):
+            Perm.objects.provision_object_perms(self.articles, owner=self.user)
+
+        self.assertEqual(self._get_object_perms(self.user), {
+            (codename, article.pk) for article in self.articles for codename in ('change', 'delete')
+        })
+
+    def test_provision_object_perms_owner(self):
+        other_user = UserFactory()
+
+        Perm.objects.provision_object_perms(
+            Article.objects.order_by('pk').iterator(),
+            owner=lambda article: self.user if article == self.articles[0] else other_user,
+            codenames=['change'],
+        )
+
+        self.assertEqual(self._get_object_perms(self.user), {('change', self.articles[0].pk)})
+        self.assertEqual(self._get_object_perms(other_user), {
+            ('change', self.articles[1].pk), ('change', self.articles[2].pk),
+        })
+
+    def test_provision_object_perms_single_signal(self):
+        calls = []
+
+        def receiver(sender, **kwargs):
+            calls.append((kwargs['action'], kwargs['grants']))
+
+        owners = [self.user, UserFactory(), UserFactory()]
+        perms_changed.connect(receiver)
+        try:
+            Perm.objects.provision_object_perms(
+                self.articles, owner=lambda article: owners[self.articles.index(article)], codenames=['change'],
+            )
+        finally:
+            perms_changed.disconnect(receiver)
+
+        perms = [Perm.objects.get_from_str('object.articles.Article.change', article) for article in self.articles]
+        self.assertEqual(calls, [
+            ('grant', [(owner.pk, perm.pk) for owner, perm in zip(owners, perms)]),
+        ])
+
+    @override_settings(PERM_EFFECTIVE_PERMS=True)
+    def test_provision_object_perms_effective_perms(self):
+        other_user = UserFactory()
+
+        Perm.objects.provision_object_perms(
+            self.articles, owner=lambda article: self.user if article == self.articles[0] else other_user,
+        )
+
+        # each owner holds only the perms of its own objects
+        self.assertEqual(
+            set(EffectivePerm.objects.values_list('user', 'perm')),
+            {(perm_user.pk, perm.pk) for perm_user in (self.user, other_user) for perm in perm_user.perms.all()},
+        )
+        self.assertEqual(EffectivePerm.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(EffectivePerm.objects.filter(user=other_user).count(), 4)
+
+    def test_provision_object_perms_existing(self):
+        Perm.objects.provision_object_perms(self.articles)
+        self.assertEqual(Perm.objects.count(), 6)
+
+        Perm.objects.provision_object_perms(self.articles, owner=self.user)
+
+        self.assertEqual(Perm.objects.count(), 6)
+        self.assertTrue(self.user.perms.has_perm('object.articles.Article.delete', self.articles[1]))
+
+    def test_admin_save_related(self):
+        request = RequestFactory().post('/admin/articles/article/add/')
+        request.user = self.user
+        model_admin = admin.site._registry[Article]
+        form = model_admin.get_form(request)({'name': 'name', 'text': 'text'})
+        self.assertTrue(form.is_valid())
+
+        article = model_admin.save_form(request, form, change=False)
+        model_admin.save_model(request, article, form, change=False)
+        model_admin.save_related(request, form, [], change=False)
+
+        self.assertEqual(self._get_object_perms(self.user), {('change', article.pk), ('delete', article.pk)})
@@ -0,0 +1,106 @@
+from unittest import mock
+
+from fperms import get_perm_model
+
+from .base import ArticleUserPermTestCase, ArticleGroupPermTestCase
+from .factories import GroupFactory
+
+
+Perm = get_perm_model()
+
+
+class PermCacheTestCaseMixin:
+
+    def _create_perm(self):
+        return Perm.objects.create(
+            codename='export',
+        )
+
+
+class ArticleUserPermCacheTestCase(PermCacheTestCaseMixin, ArticleUserPermTestCase):
+
+    def test_perms_cached_on_user(self):
+        perm = self._create_perm()
+        self.user.perms.add_perm(perm)
+
+        self.assertTrue(self.user.perms.has_perm(perm))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.perms.has_perm(perm))
+            self.assertEqual(self.user.perms.get_perm(perm), perm)
+
+    def test_perms_cache_cleared_on_add_perm(self):
+        perm = self._create_perm()
+
+        self.assertFalse(self.user.perms.has_perm(perm))
+
+        self.user.perms.add_perm(perm)
+
+        self.assertTrue(self.user.perms.has_perm(perm))
+
+    def test_perms_cache_cleared_on_remove_perm(self):
+        perm = self._create_perm()
+        self.user.perms.add_perm(perm)
+
+        self.assertTrue(self.user.perms.has_perm(perm))
+
+        self.user.perms.remove_perm(perm)
+
+        self.assertFalse(self.user.perms.has_perm(perm))
+
+
+class ArticleGroupPermCacheTestCase(PermCacheTestCaseMixin, ArticleGroupPermTestCase):
+
+    def test_perms_cached_on_group(self):
+        perm = self._create_perm()
+        self.group.perms.add_perm(perm)
+
+        self.assertTrue(self.group.perms.has_perm(perm))
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.group.perms.has_perm(perm))
+
+    def test_perms_cache_cleared_on_group_removal(self):
+        perm = self._create_perm()
+        self.group.perms.add_perm(perm)
+        self.user.groups.add(self.group)
+
+        self.assertTrue(self.user.perms.has_perm(perm))
+
+        self.user.groups.remove(self.group)
+
+        self.assertFalse(self.user.perms.has_perm(perm))
+
+    def _add_group_perms(self, count):
+        # grant the perm to the user directly and via several groups, along with a perm of each group
+        perm = self._create_perm()
+        self.user.perms.add_perm(perm)
+        for _ in range(count):
+            group = GroupFactory()
+            group.perms.add(perm, Perm.objects.create(codename='export', object_id=group.pk))
+            self.user.groups.add(group)
+        return perm
+
+    def test_all_perms_single_query(self):
+        self._add_group_perms(5)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(len(self.user.perms.all_perms()), 6)
+
+    def test_all_perms_shared_cache_not_queried(self):
+        self._add_group_perms(1)
+
+        with mock.patch('fperms.managers.get_shared_cache') as get_shared_cache:
+            self.user.perms.all_perms()
+        get_shared_cache.assert_not_called()
+
+    def test_perm_keys(self):
+        perm = self._add_group_perms(5)
+
+        with self.assertNumQueries(1):
+            perm_keys = self.user.perms.perm_keys()
+            self.assertEqual(len(perm_keys), 6)
+            self.assertEqual(perm_keys[perm.perm_key], perm.pk)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.perms.has_perm(perm))
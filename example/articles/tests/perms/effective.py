@@ -0,0 +1,159 @@
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.test import override_settings
+
+from fperms import get_perm_model
+from fperms.managers import BULK_BATCH_SIZE
+from fperms.models import EffectivePerm
+
+from articles.models import Article
+
+from .base import ArticleGroupPermTestCase
+from .factories import ArticleFactory, GroupFactory
+
+
+Perm = get_perm_model()
+User = get_user_model()
+
+
+@override_settings(PERM_EFFECTIVE_PERMS=True)
+class ArticleEffectivePermTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.perm = Perm.objects.create(
+            codename='export',
+        )
+
+    def _get_effective_perms(self):
+        return set(EffectivePerm.objects.values_list('user', 'perm', 'group'))
+
+    def _get_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_user_perms(self):
+        self.user.perms.add(self.perm)
+        self.assertEqual(self._get_effective_perms(), {(self.user.pk, self.perm.pk, None)})
+
+        self.perm.users.remove(self.user)
+        self.assertEqual(self._get_effective_perms(), set())
+
+        self.perm.users.add(self.user)
+        self.perm.users.clear()
+        self.assertEqual(self._get_effective_perms(), set())
+
+    def test_group_perms(self):
+        self.user.groups.add(self.group)
+        self.group.perms.add(self.perm)
+        self.assertEqual(self._get_effective_perms(), {(self.user.pk, self.perm.pk, self.group.pk)})
+
+        self.perm.groups.remove(self.group)
+        self.assertEqual(self._get_effective_perms(), set())
+
+        self.perm.groups.add(self.group)
+        self.assertEqual(self._get_effective_perms(), {(self.user.pk, self.perm.pk, self.group.pk)})
+
+        self.group.perms.clear()
+        self.assertEqual(self._get_effective_perms(), set())
+
+    def test_group_membership(self):
+        self.group.perms.add(self.perm)
+        self.user.groups.add(self.group)
+        self.assertEqual(self._get_effective_perms(), {(self.user.pk, self.perm.pk, self.group.pk)})
+
+        self.group.user_set.remove(self.user)
+        self.assertEqual(self._get_effective_perms(), set())
+
+        self.group.user_set.add(self.user)
+        self.user.groups.clear()
+        self.assertEqual(self._get_effective_perms(), set())
+
+    def test_perm_kept_from_other_sources(self):
+        other_group = GroupFactory()
+        self.user.perms.add(self.perm)
+        self.user.groups.add(self.group, other_group)
+        self.perm.groups.add(self.group, other_group)
+
+        self.user.groups.remove(self.group)
+        self.perm.users.remove(self.user)
+
+        self.assertEqual(self._get_effective_perms(), {(self.user.pk, self.perm.pk, other_group.pk)})
+        self.assertTrue(self._get_user().perms.has_perm(self.perm))
+
+    def test_load_perms_single_query(self):
+        for _ in range(3):
+            group = GroupFactory()
+            group.perms.add(Perm.objects.create(codename='export', object_id=group.pk))
+            self.user.groups.add(group)
+        self.user.groups.add(self.group)
+        self.group.perms.add(self.perm)
+
+        user = self._get_user()
+        with self.assertNumQueries(1):
+            self.assertEqual(len(user.perms._get_perms()), 4)
+
+    def test_filter_objects(self):
+        article = ArticleFactory()
+        ArticleFactory()
+        Perm.objects.create_from_str('object.articles.Article.change', obj=article)
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm('object.articles.Article.change', obj=article)
+
+        self.assertEqual(list(Article.objects.with_perm(self.user, 'change')), [article])
+
+    def test_annotate_perms(self):
+        article = ArticleFactory()
+        article2 = ArticleFactory()
+        Perm.objects.create_from_str('object.articles.Article.change', obj=article)
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm('object.articles.Article.change', obj=article)
+
+        articles = Article.objects.annotate_perms(self.user, ['change'])
+        self.assertEqual({a.pk: a.can_change for a in articles}, {article.pk: True, article2.pk: False})
+
+    def test_rebuild(self):
+        self.user.perms.add(self.perm)
+        self.user.groups.add(self.group)
+        self.group.perms.add(self.perm)
+        effective_perms = self._get_effective_perms()
+
+        EffectivePerm.objects.all().delete()
+        stdout = StringIO()
+        call_command('rebuild_effective_perms', stdout=stdout)
+
+        self.assertEqual(self._get_effective_perms(), effective_perms)
+        self.assertIn('Rebuilt 2 effective permissions', stdout.getvalue())
+
+    def test_rebuild_batched(self):
+        perms = Perm.objects.bulk_create([Perm(codename='export{}'.format(i)) for i in range(BULK_BATCH_SIZE + 1)])
+        through = Perm.users.through
+        through.objects.bulk_create([through(perm_id=perm.pk, user_id=self.user.pk) for perm in Perm.objects.all()])
+
+        # the rows are built and inserted a batch at a time
+        with mock.patch.object(EffectivePerm.objects, 'bulk_create', wraps=EffectivePerm.objects.bulk_create) as bulk:
+            EffectivePerm.objects.rebuild()
+        self.assertEqual([len(call[0][0]) for call in bulk.call_args_list], [BULK_BATCH_SIZE, 2])
+        self.assertEqual(EffectivePerm.objects.count(), len(perms) + 1)
+
+    def test_grant_direct_existing(self):
+        self.user.perms.add(self.perm)
+        EffectivePerm.objects.grant_direct([self.user.pk], [self.perm.pk])
+
+        self.assertEqual(EffectivePerm.objects.count(), 1)
+
+    def test_direct_unique(self):
+        self.user.perms.add(self.perm)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            EffectivePerm.objects.create(user=self.user, perm=self.perm)
+
+    @override_settings(PERM_EFFECTIVE_PERMS=False)
+    def test_disabled(self):
+        self.user.perms.add(self.perm)
+
+        self.assertFalse(EffectivePerm.objects.exists())
+        self.assertTrue(self._get_user().perms.has_perm(self.perm))
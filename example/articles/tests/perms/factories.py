@@ -40,3 +40,20 @@ class ArticleFactory(factory.DjangoModelFactory):
 
     class Meta:
         model = 'articles.Article'
+
+
+class RevisionFactory(factory.DjangoModelFactory):
+
+    text = fuzzy.FuzzyText()
+
+    class Meta:
+        model = 'articles.Revision'
+
+
+class TagFactory(factory.DjangoModelFactory):
+
+    slug = factory.Sequence(lambda n: 'tag-{0}'.format(n))
+    name = fuzzy.FuzzyText()
+
+    class Meta:
+        model = 'articles.Tag'
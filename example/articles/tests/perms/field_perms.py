@@ -0,0 +1,132 @@
+from django import forms
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test.client import RequestFactory
+
+from fperms import enums
+from fperms.admin import PermModelAdmin
+from fperms.forms import PermFieldsFormMixin
+from fperms.models import Perm
+
+from articles.models import Article
+
+from .base import ArticleGroupPermTestCase
+
+
+User = get_user_model()
+
+
+class ArticleForm(PermFieldsFormMixin, forms.ModelForm):
+
+    class Meta:
+        model = Article
+        fields = ['name', 'text']
+
+
+class ArticleFieldPermsAdmin(PermModelAdmin):
+
+    perms_per_field = True
+
+
+class ArticleFieldPermsTestCase(ArticleGroupPermTestCase):
+
+    def _create_perm(self, field_name, codename):
+        return Perm.objects.create(
+            type=enums.PERM_TYPE_FIELD,
+            codename=codename,
+            content_type=self._get_content_type(),
+            field_name=field_name,
+        )
+
+    def _get_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_field_perms(self):
+        self.user.perms.add_perm(self._create_perm('name', enums.PERM_CODENAME_VIEW))
+        self.user.perms.add_perm(self._create_perm('name', enums.PERM_CODENAME_CHANGE))
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm(self._create_perm('text', enums.PERM_CODENAME_VIEW))
+        self._create_perm('text', enums.PERM_CODENAME_CHANGE)
+
+        user = self._get_user()
+        with self.assertNumQueries(1):
+            field_perms = user.perms.field_perms(Article)
+
+        self.assertEqual(field_perms, {
+            enums.PERM_CODENAME_VIEW: {'name', 'text'},
+            enums.PERM_CODENAME_CHANGE: {'name'},
+        })
+
+    def test_field_perms_codenames(self):
+        self.user.perms.add_perm(self._create_perm('name', enums.PERM_CODENAME_ADD))
+        self.user.perms.add_perm(self._create_perm('text', enums.PERM_CODENAME_VIEW))
+
+        self.assertEqual(self._get_user().perms.field_perms(Article, codenames=[enums.PERM_CODENAME_ADD]), {
+            enums.PERM_CODENAME_ADD: {'name'},
+        })
+
+    def test_field_perms_from_wildcard(self):
+        self.user.perms.add_perm(self._create_perm('name', enums.PERM_CODENAME_WILDCARD))
+        self.user.perms.add_perm(self._create_perm('text', enums.PERM_CODENAME_WILDCARD))
+        # the perm takes precedence over the wildcard perm if it exists, as in ``has_perm``
+        self._create_perm('text', enums.PERM_CODENAME_CHANGE)
+
+        user = self._get_user()
+        self.assertEqual(user.perms.field_perms(Article), {
+            enums.PERM_CODENAME_VIEW: {'name', 'text'},
+            enums.PERM_CODENAME_CHANGE: {'name'},
+        })
+        self.assertFalse(user.perms.has_perm('field.articles.Article.text.change'))
+        self.assertTrue(user.perms.has_perm('field.articles.Article.name.change'))
+
+    def test_field_perms_cached(self):
+        self.user.perms.add_perm(self._create_perm('name', enums.PERM_CODENAME_CHANGE))
+        user = self._get_user()
+        user.perms.perm_keys()
+
+        with self.assertNumQueries(1):
+            self.assertEqual(user.perms.field_perms(Article)[enums.PERM_CODENAME_CHANGE], {'name'})
+
+    def test_field_perms_superuser(self):
+        self.user.is_superuser = True
+
+        with self.assertNumQueries(0):
+            field_perms = self.user.perms.field_perms(Article)
+        self.assertEqual(field_perms[enums.PERM_CODENAME_CHANGE], {'id', 'name', 'text'})
+
+    def test_form(self):
+        self.user.perms.add_perm(self._create_perm('name', enums.PERM_CODENAME_CHANGE))
+        self.user.perms.add_perm(self._create_perm('text', enums.PERM_CODENAME_VIEW))
+
+        form = ArticleForm(user=self._get_user())
+        self.assertEqual(list(form.fields), ['name', 'text'])
+        self.assertFalse(form.fields['name'].disabled)
+        self.assertTrue(form.fields['text'].disabled)
+
+        form = ArticleForm(data={'name': 'name', 'text': 'changed'}, initial={'text': 'text'}, user=self._get_user())
+        self.assertTrue(form.is_valid())
+        self.assertEqual(form.cleaned_data['text'], 'text')
+
+    def test_form_without_perms(self):
+        self.assertEqual(list(ArticleForm(user=self._get_user()).fields), [])
+        self.assertEqual(list(ArticleForm().fields), ['name', 'text'])
+
+    def test_admin(self):
+        self.user.perms.add_perm(self._create_perm('name', enums.PERM_CODENAME_VIEW))
+        request = RequestFactory().get('/admin/articles/article/add/')
+        request.user = self._get_user()
+        model_admin = ArticleFieldPermsAdmin(Article, admin.site)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(model_admin.get_readonly_fields(request), ['name'])
+            self.assertEqual(model_admin.get_exclude(request), ['text'])
+            self.assertEqual(model_admin.get_fields(request), ['name'])
+
+    def test_admin_disabled(self):
+        request = RequestFactory().get('/admin/articles/article/add/')
+        request.user = self._get_user()
+        model_admin = PermModelAdmin(Article, admin.site)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(model_admin.get_readonly_fields(request), [])
+            self.assertIsNone(model_admin.get_exclude(request))
@@ -0,0 +1,31 @@
+from django.test import SimpleTestCase
+from django.test.utils import isolate_apps
+
+from fperms.base import BasePerm
+from fperms.models import Perm
+
+
+class PermIndexesTestCase(SimpleTestCase):
+
+    def test_perm_indexes(self):
+        self.assertEqual(
+            [index.name for index in Perm._meta.indexes],
+            ['fperms_perm_ct_obj_code_idx', 'fperms_perm_ct_code_null_idx'],
+        )
+
+    @isolate_apps('articles')
+    def test_custom_perm_model_indexes(self):
+        # swapped perm models get the indexes as well, named after the model
+        class Acl(BasePerm):
+
+            class Meta(BasePerm.Meta):
+                app_label = 'articles'
+
+        self.assertEqual(
+            [index.name for index in Acl._meta.indexes],
+            ['articles_acl_ct_obj_code_idx', 'articles_acl_ct_code_null_idx'],
+        )
+        self.assertEqual(
+            [index.fields for index in Acl._meta.indexes],
+            [['content_type', 'object_id', 'codename'], ['content_type', 'codename']],
+        )
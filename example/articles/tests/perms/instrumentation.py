@@ -0,0 +1,102 @@
+from django.contrib.auth import get_user_model
+
+from fperms import enums, get_perm_model
+from fperms.backends import PermBackend
+from fperms.instrumentation import (
+    EVENT_DOES_NOT_EXIST, EVENT_LRU_CACHE_HIT, EVENT_PERMS_CACHE_HIT, EVENT_WILDCARD_FALLBACK, perm_checked,
+    record_perm_checks,
+)
+from fperms.utils import get_perm
+
+from .base import ArticleUserPermTestCase
+from .factories import ArticleFactory
+
+
+Perm = get_perm_model()
+User = get_user_model()
+
+
+class ArticlePermInstrumentationTestCase(ArticleUserPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.perm = Perm.objects.create(
+            codename='export',
+        )
+
+    def _get_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_has_perm(self):
+        self.user.perms.add_perm(self.perm)
+        user = self._get_user()
+
+        with record_perm_checks() as stats:
+            self.assertTrue(user.perms.has_perm('generic.export'))
+            self.assertTrue(user.perms.has_perm('generic.export'))
+
+        self.assertEqual(stats.checks, 2)
+        self.assertEqual(stats.queries, 1)
+        self.assertEqual(stats.most_common(), [('generic.export', 2)])
+        self.assertEqual(stats.events[EVENT_PERMS_CACHE_HIT], 2)
+        # the second check is answered from the cached permission keys without resolving the perm
+        self.assertEqual(stats.events[EVENT_LRU_CACHE_HIT], 0)
+        self.assertEqual(stats.sources['has_perm']['checks'], 2)
+        self.assertNotIn('get_perm', stats.sources)
+
+    def test_wildcard_fallback(self):
+        article = ArticleFactory()
+        Perm.objects.create_from_str('object.articles.Article.*', obj=article)
+
+        with record_perm_checks() as stats:
+            self.assertEqual(get_perm('object.articles.Article.change', obj=article).codename, '*')
+
+        self.assertEqual(stats.events[EVENT_WILDCARD_FALLBACK], 1)
+
+    def test_does_not_exist(self):
+        with record_perm_checks() as stats:
+            self.assertFalse(self._get_user().perms.has_perm('generic.import'))
+
+        self.assertEqual(stats.events[EVENT_DOES_NOT_EXIST], 1)
+
+    def test_backend(self):
+        Perm.objects.create_from_str('model.articles.Article.change')
+        user = self._get_user()
+
+        with record_perm_checks() as stats:
+            PermBackend().has_perm(user, 'articles.change_article')
+            PermBackend().has_module_perms(user, 'articles')
+
+        # both are derived from the permissions loaded once for the user
+        self.assertEqual(stats.queries, 1)
+        self.assertEqual(set(stats.sources), {'backend.has_perm', 'backend.has_module_perms'})
+
+    def test_receiver(self):
+        checks = []
+
+        def receiver(sender, check, **kwargs):
+            checks.append(check)
+
+        perm_checked.connect(receiver)
+        try:
+            self.assertFalse(self.user.perms.has_perm(self.perm))
+        finally:
+            perm_checked.disconnect(receiver)
+
+        # nested checks are sent first, as they finish first
+        self.assertEqual([(check.source, check.nested, check.result) for check in checks], [
+            ('get_perm', True, self.perm),
+            ('has_perm', False, False),
+        ])
+
+    def test_not_instrumented_without_receivers(self):
+        checks = []
+        with record_perm_checks():
+            pass
+        perm_checked.connect(checks.append, weak=False, dispatch_uid='test')
+        perm_checked.disconnect(dispatch_uid='test')
+
+        self.user.perms.has_perm(self.perm)
+
+        self.assertEqual(checks, [])
+        self.assertFalse(perm_checked.receivers)
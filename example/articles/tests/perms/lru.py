@@ -0,0 +1,158 @@
+from unittest import mock
+
+from django.test import override_settings
+
+from fperms import enums
+from fperms.cache import PERM_CACHE_PERMS_GENERATION_KEY, bump_generation, perm_lru_cache
+from fperms.models import Perm
+from fperms.utils import get_perm
+
+from .base import ArticleTestCase
+
+
+class PermLRUCacheTestCase(ArticleTestCase):
+
+    def _create_perm(self, codename=enums.PERM_CODENAME_ADD):
+        return Perm.objects.create(
+            type=enums.PERM_TYPE_MODEL,
+            codename=codename,
+            content_type=self._get_content_type(),
+        )
+
+    def test_get_perm_cached(self):
+        perm = self._create_perm()
+
+        self.assertEqual(get_perm('model.articles.Article.add'), perm)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_perm('model.articles.Article.add'), perm)
+
+        info = perm_lru_cache.info()
+        self.assertEqual(info.hits, 1)
+        self.assertEqual(info.misses, 1)
+
+    def test_non_existent_perm_not_cached(self):
+        # perms which do not exist may be created by another process at any time
+        with self.assertRaises(Perm.DoesNotExist):
+            get_perm('model.articles.Article.add')
+
+        with self.assertNumQueries(1):
+            with self.assertRaises(Perm.DoesNotExist):
+                get_perm('model.articles.Article.add')
+
+    @override_settings(PERM_LRU_CACHE_TIMEOUT=0)
+    def test_expired(self):
+        self._create_perm()
+        get_perm('model.articles.Article.add')
+
+        with self.assertNumQueries(1):
+            get_perm('model.articles.Article.add')
+
+    def test_not_shared(self):
+        self._create_perm()
+        perm = get_perm('model.articles.Article.add')
+        perm.name = 'changed'
+
+        cached_perm = get_perm('model.articles.Article.add')
+        self.assertEqual(cached_perm, perm)
+        self.assertIsNot(cached_perm, perm)
+        self.assertIsNone(cached_perm.name)
+
+    @override_settings(PERM_CACHE='default')
+    def test_cleared_on_generation_change(self):
+        self._create_perm()
+        self._create_perm(enums.PERM_CODENAME_CHANGE)
+
+        with mock.patch('fperms.cache.time.monotonic', return_value=1000):
+            get_perm('model.articles.Article.add')
+        with mock.patch('fperms.cache.time.monotonic', return_value=1030):
+            get_perm('model.articles.Article.change')
+            # e.g. a perm saved in another process, no signal is sent in this one
+            bump_generation(PERM_CACHE_PERMS_GENERATION_KEY)
+            # the generation is checked at most once per timeout
+            with self.assertNumQueries(0):
+                get_perm('model.articles.Article.change')
+        with mock.patch('fperms.cache.time.monotonic', return_value=1061):
+            with self.assertNumQueries(1):
+                get_perm('model.articles.Article.change')
+
+    @override_settings(PERM_CACHE='default')
+    def test_not_cleared_on_grant(self):
+        perm = self._create_perm()
+        self._create_perm(enums.PERM_CODENAME_CHANGE)
+
+        with mock.patch('fperms.cache.time.monotonic', return_value=1000):
+            get_perm('model.articles.Article.add')
+        with mock.patch('fperms.cache.time.monotonic', return_value=1030):
+            get_perm('model.articles.Article.change')
+        # resolved perms do not depend on the grants
+        self.user.perms.add_perm(perm)
+        with mock.patch('fperms.cache.time.monotonic', return_value=1061):
+            with self.assertNumQueries(0):
+                get_perm('model.articles.Article.change')
+
+    def test_evicted_on_save(self):
+        with self.assertRaises(Perm.DoesNotExist):
+            get_perm('model.articles.Article.add')
+
+        perm = self._create_perm()
+
+        self.assertEqual(get_perm('model.articles.Article.add'), perm)
+
+    def test_evicted_on_delete(self):
+        perm = self._create_perm()
+        get_perm('model.articles.Article.add')
+
+        perm.delete()
+
+        with self.assertRaises(Perm.DoesNotExist):
+            get_perm('model.articles.Article.add')
+
+    def test_evicted_on_wildcard_change(self):
+        with self.assertRaises(Perm.DoesNotExist):
+            get_perm('model.articles.Article.add')
+
+        wildcard_perm = self._create_perm(enums.PERM_CODENAME_WILDCARD)
+
+        self.assertEqual(get_perm('model.articles.Article.add'), wildcard_perm)
+
+        perm = self._create_perm()
+
+        self.assertEqual(get_perm('model.articles.Article.add'), perm)
+
+    @override_settings(PERM_LRU_CACHE_SIZE=2)
+    def test_bounded(self):
+        for codename in ('add', 'change', 'delete'):
+            self._create_perm(codename)
+            get_perm('model.articles.Article.{}'.format(codename))
+
+        self.assertEqual(perm_lru_cache.info().currsize, 2)
+
+        with self.assertNumQueries(1):
+            get_perm('model.articles.Article.add')
+
+    @override_settings(PERM_LRU_CACHE_SIZE=0)
+    def test_disabled(self):
+        self._create_perm()
+        get_perm('model.articles.Article.add')
+
+        self.assertEqual(perm_lru_cache.info().currsize, 0)
+
+    def test_evict_many(self):
+        add_perm = self._create_perm()
+        change_perm = self._create_perm(enums.PERM_CODENAME_CHANGE)
+        get_perm('model.articles.Article.add')
+        get_perm('model.articles.Article.change')
+
+        # a wildcard perm does not override existing perms, but perms falling back to it are evicted
+        perm_lru_cache.evict_many([add_perm, Perm(
+            type=enums.PERM_TYPE_MODEL,
+            codename=enums.PERM_CODENAME_WILDCARD,
+            content_type=self._get_content_type(),
+        )])
+        self.assertEqual(perm_lru_cache.info().currsize, 0)
+
+        get_perm('model.articles.Article.add')
+        get_perm('model.articles.Article.change')
+        perm_lru_cache.evict_many([change_perm])
+        self.assertEqual(perm_lru_cache.info().currsize, 1)
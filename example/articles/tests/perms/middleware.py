@@ -0,0 +1,127 @@
+from django.contrib.auth import get_user_model
+from django.http import HttpResponse
+from django.test.client import RequestFactory
+
+from fperms.backends import PermBackend
+from fperms.instrumentation import count_perm_checks, perm_checked, record_perm_checks
+from fperms.middleware import PermMiddleware
+from fperms.models import Perm
+
+from .base import ArticleGroupPermTestCase
+from .factories import ArticleFactory
+
+
+User = get_user_model()
+
+
+class ArticlePermMiddlewareTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.article = ArticleFactory()
+        self.user.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.change')[0])
+        self.user.perms.add_perm(Perm.objects.create_from_str('object.articles.Article.delete', self.article)[0])
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.add')[0])
+        self.request_factory = RequestFactory()
+
+    def _get_request(self):
+        request = self.request_factory.get('/articles/')
+        request.user = User.objects.get(pk=self.user.pk)
+        return request
+
+    def _view(self, request):
+        backend = PermBackend()
+        user = request.user
+        results = [
+            user.perms.has_perm('model.articles.Article.change'),
+            user.perms.has_perm('model.articles.Article.add'),
+            user.perms.has_perm('object.articles.Article.delete', self.article),
+            user.perms.has_perm('object.articles.Article.change', self.article),
+            backend.has_perm(user, 'articles.change_article'),
+            backend.has_perm(user, 'articles.delete_article'),
+            backend.has_module_perms(user, 'articles'),
+            backend.has_module_perms(user, 'auth'),
+        ]
+        return HttpResponse(results)
+
+    def test_single_query(self):
+        request = self._get_request()
+        middleware = PermMiddleware(self._view)
+
+        with self.assertNumQueries(1):
+            response = middleware(request)
+
+        self.assertEqual(response.content, b'TrueTrueTrueFalseTrueFalseTrueFalse')
+        self.assertEqual(request.perm_stats.checks, 8)
+        self.assertEqual(request.perm_stats.cached_checks, 7)
+        self.assertEqual(request.perm_stats.queries, 1)
+
+    def test_no_checks(self):
+        request = self._get_request()
+        middleware = PermMiddleware(lambda request: HttpResponse())
+
+        with self.assertNumQueries(0):
+            middleware(request)
+
+        self.assertEqual(request.perm_stats.checks, 0)
+
+    def test_stats_per_request(self):
+        middleware = PermMiddleware(self._view)
+        requests = [self._get_request(), self._get_request()]
+        for request in requests:
+            middleware(request)
+
+        for request in requests:
+            self.assertEqual(request.perm_stats.checks, 8)
+            self.assertEqual(request.perm_stats.queries, 1)
+
+        # checks outside of a request are not aggregated
+        self.assertFalse(self.user.perms.has_perm('model.articles.Article.delete'))
+        self.assertEqual(requests[-1].perm_stats.checks, 8)
+
+    def test_superuser(self):
+        self.user.is_superuser = True
+        self.user.save()
+        request = self._get_request()
+
+        with self.assertNumQueries(0):
+            PermMiddleware(self._view)(request)
+
+        self.assertEqual(request.perm_stats.cached_checks, request.perm_stats.checks)
+
+    def test_log(self):
+        with self.assertLogs('fperms', 'DEBUG') as logs:
+            PermMiddleware(self._view)(self._get_request())
+
+        self.assertEqual(logs.output, [
+            'DEBUG:fperms:GET /articles/: permission checks 8, served without a query 7, queries 1',
+        ])
+
+    def test_not_instrumented(self):
+        PermMiddleware(self._view)
+        # checks are only counted, the middleware does not instrument every check of the process
+        self.assertFalse(perm_checked.receivers)
+
+    def test_instrumented(self):
+        request = self._get_request()
+
+        with record_perm_checks() as stats:
+            PermMiddleware(self._view)(request)
+
+        self.assertEqual(stats.checks, 8)
+        self.assertEqual(request.perm_stats.as_dict(), {'checks': 8, 'cached_checks': 7, 'queries': 1})
+
+    def test_nested_count(self):
+        def view(request):
+            with count_perm_checks() as stats:
+                response = self._view(request)
+            self.assertEqual(stats.checks, 8)
+            # checks after the nested block are still counted for the request
+            request.user.perms.has_perm('model.articles.Article.delete')
+            return response
+
+        request = self._get_request()
+        PermMiddleware(view)(request)
+
+        self.assertEqual(request.perm_stats.as_dict(), {'checks': 9, 'cached_checks': 8, 'queries': 1})
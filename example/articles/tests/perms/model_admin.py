@@ -0,0 +1,118 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.test.client import RequestFactory
+
+from fperms.admin import PermModelAdmin
+from fperms.models import Perm
+
+from articles.models import Article
+
+from .base import ArticleGroupPermTestCase
+from .factories import ArticleFactory
+
+
+User = get_user_model()
+
+
+class ArticlePerInstanceAdmin(PermModelAdmin):
+
+    perms_per_instance = True
+
+
+class ArticlePermModelAdminTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.article = ArticleFactory()
+        self.article2 = ArticleFactory()
+        self.model_admin = PermModelAdmin(Article, admin.site)
+        self.instance_admin = ArticlePerInstanceAdmin(Article, admin.site)
+
+    def _get_request(self):
+        request = RequestFactory().get('/admin/articles/article/')
+        request.user = User.objects.get(pk=self.user.pk)
+        return request
+
+    def test_has_change_permission(self):
+        self.user.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.change')[0])
+        Perm.objects.create_from_str('model.articles.Article.delete')
+        request = self._get_request()
+
+        self.assertTrue(self.model_admin.has_change_permission(request))
+        self.assertTrue(self.model_admin.has_change_permission(request, self.article))
+        self.assertFalse(self.model_admin.has_delete_permission(request))
+        self.assertFalse(self.model_admin.has_add_permission(request))
+
+    def test_has_change_permission_field_perm_same_codename(self):
+        # model and field perms sharing the codename used to fail with MultipleObjectsReturned
+        self.user.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.change')[0])
+        Perm.objects.create_from_str('field.articles.Article.name.change')
+
+        self.assertTrue(self.model_admin.has_change_permission(self._get_request()))
+
+    def test_has_change_permission_from_group(self):
+        self.user.groups.add(self.group)
+        self.group.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.change')[0])
+
+        self.assertTrue(self.model_admin.has_change_permission(self._get_request()))
+
+    def test_has_change_permission_per_instance(self):
+        self.user.perms.add_perm(Perm.objects.create_from_str('object.articles.Article.change', self.article)[0])
+        Perm.objects.create_from_str('object.articles.Article.change', self.article2)
+        request = self._get_request()
+
+        self.assertTrue(self.instance_admin.has_change_permission(request, self.article))
+        self.assertFalse(self.instance_admin.has_change_permission(request, self.article2))
+        self.assertFalse(self.instance_admin.has_delete_permission(request, self.article))
+        self.assertFalse(self.instance_admin.has_change_permission(request))
+
+    def test_has_change_permission_from_wildcard(self):
+        self.user.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.*')[0])
+        self.user.perms.add_perm(Perm.objects.create_from_str('object.articles.Article.*', self.article)[0])
+        # the perms take precedence over the wildcard perms if they exist
+        Perm.objects.create_from_str('model.articles.Article.delete')
+        Perm.objects.create_from_str('object.articles.Article.delete', self.article)
+        request = self._get_request()
+
+        self.assertTrue(self.model_admin.has_change_permission(request))
+        self.assertFalse(self.model_admin.has_delete_permission(request))
+        self.assertTrue(self.instance_admin.has_change_permission(request, self.article))
+        self.assertFalse(self.instance_admin.has_delete_permission(request, self.article))
+        self.assertFalse(self.instance_admin.has_change_permission(request, self.article2))
+
+    def test_single_query_per_request(self):
+        self.user.perms.add_perm(Perm.objects.create_from_str('object.articles.Article.change', self.article)[0])
+        articles = [self.article, self.article2] + [ArticleFactory() for _ in range(5)]
+        request = self._get_request()
+
+        with self.assertNumQueries(1):
+            for article in articles:
+                self.instance_admin.has_change_permission(request, article)
+                self.instance_admin.has_delete_permission(request, article)
+            self.model_admin.has_change_permission(request)
+
+    def test_single_query_per_request_wildcard(self):
+        self.user.perms.add_perm(Perm.objects.create_from_str('object.articles.Article.*', self.article)[0])
+        request = self._get_request()
+
+        # a second query for the perms overriding the held wildcard perms
+        with self.assertNumQueries(2):
+            for article in (self.article, self.article2):
+                self.instance_admin.has_change_permission(request, article)
+                self.instance_admin.has_delete_permission(request, article)
+
+    def test_new_perms_next_request(self):
+        self.assertFalse(self.model_admin.has_change_permission(self._get_request()))
+
+        self.user.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.change')[0])
+
+        self.assertTrue(self.model_admin.has_change_permission(self._get_request()))
+
+    def test_superuser(self):
+        self.user.is_superuser = True
+        self.user.save()
+        request = self._get_request()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.instance_admin.has_change_permission(request, self.article))
+            self.assertTrue(self.model_admin.has_delete_permission(request))
@@ -0,0 +1,169 @@
+from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db import connection, models
+from django.test import TestCase
+from django.test.client import RequestFactory
+
+from fperms import enums
+from fperms.admin import PermModelAdmin
+from fperms.models import Perm
+from fperms.utils import prefetch_perms
+
+from articles.models import Article, Revision, Tag
+
+from .base import ArticleUserPermTestCase
+from .factories import ArticleFactory, RevisionFactory, TagFactory
+
+
+User = get_user_model()
+
+
+class ObjectIdFieldTestCase(TestCase):
+
+    def test_object_id_field(self):
+        self.assertIsInstance(Perm._meta.get_field('object_id'), models.CharField)
+
+    def test_get_object_id(self):
+        revision = RevisionFactory()
+
+        self.assertEqual(Perm.get_object_id(ArticleFactory(pk=100000)), '100000')
+        revision_pk = Revision._meta.pk.get_db_prep_value(revision.pk, connection)
+        self.assertEqual(Perm.get_object_id(revision), str(revision_pk))
+        self.assertEqual(Perm.get_object_id(TagFactory(slug='news')), 'news')
+
+    def test_stored_object_id(self):
+        # ``content_object`` sets the object_id to the pk as is, it is stored as text
+        article = ArticleFactory()
+        perm = Perm.objects.create(type=enums.PERM_TYPE_OBJECT, codename='change', content_object=article)
+
+        self.assertEqual(perm.object_id, Perm.get_object_id(article))
+        self.assertEqual(perm.perm_key, Perm.objects.get(pk=perm.pk).perm_key)
+        self.assertEqual(Perm.objects.get(pk=perm.pk).content_object, article)
+
+    def test_perm_key_unsaved(self):
+        revision = RevisionFactory()
+        perm = Perm(type=enums.PERM_TYPE_OBJECT, codename='change', content_object=revision)
+
+        self.assertEqual(perm.perm_key, Perm.get_perm_key('object.articles.Revision.change', revision))
+
+
+class ArticleUserLargeObjectIdTestCase(ArticleUserPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        # beyond the range of a small integer
+        self.article = ArticleFactory(pk=100000)
+        self.perm = Perm.objects.create(
+            type=enums.PERM_TYPE_OBJECT,
+            codename=enums.PERM_CODENAME_CHANGE,
+            content_object=self.article,
+        )
+        self.user.perms.add_perm(self.perm)
+
+    def test_has_perm(self):
+        self.assertTrue(self.user.perms.has_perm('object.articles.Article.change', self.article))
+
+    def test_with_perm(self):
+        self.assertEqual(list(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE)), [self.article])
+
+    def test_prefetch_perms(self):
+        prefetch_perms(self.user, [self.article])
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.perms.has_perm('object.articles.Article.change', self.article))
+
+    def test_get_wildcard_perm(self):
+        wildcard_perm = Perm.objects.create(
+            type=enums.PERM_TYPE_OBJECT,
+            codename=enums.PERM_CODENAME_WILDCARD,
+            content_object=self.article,
+        )
+
+        self.assertEqual(list(self.perm.get_wildcard_perm()), [wildcard_perm])
+
+
+class NonIntegerObjectIdTestCaseMixin:
+
+    # object permissions of models with non-integer pks, stored in the same column as integer pks
+
+    model = None
+    factory = None
+
+    def setUp(self):
+        super().setUp()
+        self.obj = self.factory()
+        self.obj2 = self.factory()
+        self.perm_str = 'object.articles.{}.change'.format(self.model.__name__)
+        self.user.perms.add_perm(Perm.objects.create_from_str(self.perm_str, self.obj)[0])
+        Perm.objects.create_from_str(self.perm_str, self.obj2)
+
+    def _get_user(self):
+        return User.objects.get(pk=self.user.pk)
+
+    def test_get_perm_kwargs(self):
+        perm_kwargs = Perm.get_perm_kwargs(self.perm_str, self.obj)
+
+        self.assertEqual(perm_kwargs['object_id'], Perm.get_object_id(self.obj))
+        self.assertEqual(Perm.objects.get(**perm_kwargs).content_object, self.obj)
+
+    def test_has_perm(self):
+        user = self._get_user()
+
+        self.assertTrue(user.perms.has_perm(self.perm_str, self.obj))
+        self.assertFalse(user.perms.has_perm(self.perm_str, self.obj2))
+
+    def test_has_perm_by_perm(self):
+        perm = Perm.objects.create(type=enums.PERM_TYPE_OBJECT, codename='delete', content_object=self.obj)
+        self.user.perms.add_perm(perm)
+
+        self.assertTrue(self.user.perms.has_perm(perm))
+        self.assertTrue(self._get_user().perms.has_perm(perm))
+
+    def test_has_perm_cached(self):
+        user = self._get_user()
+        user.perms.perm_keys()
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user.perms.has_perm(self.perm_str, self.obj))
+            self.assertFalse(user.perms.has_perm(self.perm_str, self.obj2))
+
+    def test_with_perm(self):
+        self.assertEqual(list(self.model.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE)), [self.obj])
+
+    def test_annotate_perms(self):
+        flags = dict(self.model.objects.annotate_perms(self.user, [enums.PERM_CODENAME_CHANGE]).values_list(
+            'pk', 'can_{}'.format(enums.PERM_CODENAME_CHANGE)
+        ))
+
+        self.assertEqual(flags, {self.obj.pk: True, self.obj2.pk: False})
+
+    def test_prefetch_perms(self):
+        user = self._get_user()
+        prefetch_perms(user, [self.obj, self.obj2])
+
+        with self.assertNumQueries(0):
+            self.assertTrue(user.perms.has_perm(self.perm_str, self.obj))
+            self.assertFalse(user.perms.has_perm(self.perm_str, self.obj2))
+
+    def test_admin(self):
+        model_admin = PermModelAdmin(self.model, admin.site)
+        model_admin.perms_per_instance = True
+        request = RequestFactory().get('/admin/')
+        request.user = self._get_user()
+
+        with self.assertNumQueries(1):
+            self.assertTrue(model_admin.has_change_permission(request, self.obj))
+            self.assertFalse(model_admin.has_change_permission(request, self.obj2))
+            self.assertFalse(model_admin.has_delete_permission(request, self.obj))
+
+
+class RevisionUUIDObjectIdTestCase(NonIntegerObjectIdTestCaseMixin, ArticleUserPermTestCase):
+
+    model = Revision
+    factory = RevisionFactory
+
+
+class TagCharObjectIdTestCase(NonIntegerObjectIdTestCaseMixin, ArticleUserPermTestCase):
+
+    model = Tag
+    factory = TagFactory
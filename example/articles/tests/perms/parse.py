@@ -0,0 +1,60 @@
+from django.contrib.contenttypes.models import ContentType
+from django.test import TestCase, override_settings
+
+from fperms import enums
+from fperms.base import parse_perm
+from fperms.models import Perm
+
+from articles.models import Article
+
+
+class ParsePermTestCase(TestCase):
+
+    def setUp(self):
+        parse_perm.cache_clear()
+
+    def test_parse_model_perm(self):
+        parsed_perm = parse_perm('model.articles.Article.add')
+
+        self.assertEqual(parsed_perm.type, enums.PERM_TYPE_MODEL)
+        self.assertEqual(parsed_perm.codename, 'add')
+        self.assertEqual(parsed_perm.content_type, ContentType.objects.get_for_model(Article))
+        self.assertEqual(parsed_perm.content_type_id, ContentType.objects.get_for_model(Article).pk)
+        self.assertIsNone(parsed_perm.field_name)
+        self.assertIs(parsed_perm.model, Article)
+
+    def test_parse_field_perm(self):
+        parsed_perm = parse_perm('field.articles.Article.name.change')
+
+        self.assertEqual(parsed_perm.type, enums.PERM_TYPE_FIELD)
+        self.assertEqual(parsed_perm.codename, 'change')
+        self.assertEqual(parsed_perm.field_name, 'name')
+
+    def test_parse_memoized(self):
+        parse_perm('model.articles.Article.add')
+        ContentType.objects.clear_cache()
+
+        with self.assertNumQueries(0):
+            Perm.get_perm_kwargs('model.articles.Article.add')
+
+        self.assertEqual(parse_perm.cache_info().hits, 1)
+
+    def test_parse_cache_cleared_on_settings_change(self):
+        parse_perm('generic.export')
+
+        with override_settings(PERM_MODEL='fperms.Perm'):
+            self.assertEqual(parse_perm.cache_info().currsize, 0)
+
+    @override_settings(PERM_PARSE_CACHE_SIZE=1)
+    def test_parse_cache_size_setting(self):
+        parse_perm('generic.export')
+        parse_perm('generic.import')
+
+        self.assertEqual(parse_perm.cache_info().maxsize, 1)
+        self.assertEqual(parse_perm.cache_info().currsize, 1)
+
+    def test_perm_kwargs_content_type(self):
+        perm_kwargs = Perm.get_perm_kwargs('model.articles.Article.add')
+
+        self.assertEqual(perm_kwargs['content_type'], ContentType.objects.get_for_model(Article))
+        self.assertIsNone(Perm.get_perm_kwargs('generic.export')['content_type'])
@@ -0,0 +1,68 @@
+from fperms import enums
+from fperms.models import Perm
+from fperms.utils import prefetch_perms
+
+from .base import ArticleUserPermTestCase
+from .factories import ArticleFactory, TagFactory
+
+
+class ArticleUserPrefetchPermTestCase(ArticleUserPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.articles = [ArticleFactory() for i in range(3)]
+
+    def _create_perm(self, article, codename=enums.PERM_CODENAME_CHANGE):
+        return Perm.objects.create(
+            type=enums.PERM_TYPE_OBJECT,
+            codename=codename,
+            content_object=article,
+        )
+
+    def test_prefetch_perms(self):
+        self.user.perms.add_perm(self._create_perm(self.articles[0]))
+        self._create_perm(self.articles[1])
+        self.user.perms.add_perm(self._create_perm(self.articles[2], enums.PERM_CODENAME_WILDCARD))
+
+        # effective permissions of the user are already cached
+        self.user.perms.perm_keys()
+
+        with self.assertNumQueries(1):
+            prefetch_perms(self.user, self.articles, codenames=[enums.PERM_CODENAME_CHANGE])
+
+        with self.assertNumQueries(0):
+            results = [
+                self.user.perms.has_perm('object.articles.Article.change', article) for article in self.articles
+            ]
+        self.assertEqual(results, [True, False, True])
+
+    def test_prefetch_mixed_models(self):
+        # objects of different models, with pks of the same value
+        tag = TagFactory(slug=str(self.articles[0].pk))
+        self._create_perm(self.articles[0])
+        self.user.perms.add_perm(self._create_perm(tag))
+        self.user.perms.perm_keys()
+
+        with self.assertNumQueries(1):
+            prefetch_perms(self.user, [self.articles[0], tag, self.articles[1]])
+
+        with self.assertNumQueries(0):
+            self.assertFalse(self.user.perms.has_perm('object.articles.Article.change', self.articles[0]))
+            self.assertTrue(self.user.perms.has_perm('object.articles.Tag.change', tag))
+            self.assertFalse(self.user.perms.has_perm('object.articles.Article.change', self.articles[1]))
+
+    def test_prefetch_all_codenames(self):
+        self.user.perms.add_perm(self._create_perm(self.articles[0], enums.PERM_CODENAME_DELETE))
+
+        prefetch_perms(self.user, self.articles)
+
+        with self.assertNumQueries(0):
+            self.assertTrue(self.user.perms.has_perm('object.articles.Article.delete', self.articles[0]))
+            self.assertFalse(self.user.perms.has_perm('object.articles.Article.change', self.articles[0]))
+
+    def test_not_prefetched_codename_falls_back_to_query(self):
+        self.user.perms.add_perm(self._create_perm(self.articles[0], enums.PERM_CODENAME_DELETE))
+
+        prefetch_perms(self.user, self.articles, codenames=[enums.PERM_CODENAME_CHANGE])
+
+        self.assertTrue(self.user.perms.has_perm('object.articles.Article.delete', self.articles[0]))
@@ -0,0 +1,199 @@
+from django.contrib.auth.models import AnonymousUser
+
+from fperms import enums
+from fperms.exceptions import IncorrectPermType
+from fperms.models import Perm
+
+from articles.models import Article
+
+from .base import ArticleUserPermTestCase, ArticleGroupPermTestCase
+from .factories import ArticleFactory, UserFactory
+
+
+class ObjectQuerySetTestCaseMixin:
+
+    def setUp(self):
+        super().setUp()
+        self.article = ArticleFactory()
+        self.article2 = ArticleFactory()
+        self.article3 = ArticleFactory()
+
+    def _create_perm(self, article, codename=enums.PERM_CODENAME_CHANGE):
+        return Perm.objects.create(
+            type=enums.PERM_TYPE_OBJECT,
+            codename=codename,
+            content_object=article,
+        )
+
+
+class ArticleUserObjectQuerySetTestCase(ObjectQuerySetTestCaseMixin, ArticleUserPermTestCase):
+
+    def test_objects_for_user(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+        self.user.perms.add_perm(self._create_perm(self.article2, enums.PERM_CODENAME_DELETE))
+
+        self.assertEqual(
+            list(Perm.objects.objects_for_user(self.user, 'object.articles.Article.change')),
+            [self.article],
+        )
+
+    def test_with_perm(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+        self.user.perms.add_perm(self._create_perm(self.article2))
+        UserFactory().perms.add_perm(self._create_perm(self.article3))
+
+        self.assertEqual(
+            set(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE)),
+            {self.article, self.article2},
+        )
+
+    def test_with_perm_from_wildcard(self):
+        self.user.perms.add_perm(self._create_perm(self.article, enums.PERM_CODENAME_WILDCARD))
+
+        self.assertEqual(list(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE)), [self.article])
+
+    def test_with_perm_from_overridden_wildcard(self):
+        self.user.perms.add_perm(self._create_perm(self.article, enums.PERM_CODENAME_WILDCARD))
+        self.user.perms.add_perm(self._create_perm(self.article2, enums.PERM_CODENAME_WILDCARD))
+        # the perm takes precedence over the wildcard perm if it exists, as in ``has_perm``
+        self._create_perm(self.article)
+
+        self.assertEqual(list(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE)), [self.article2])
+        self.assertFalse(self.user.perms.has_perm('object.articles.Article.change', self.article))
+
+    def test_with_perm_single_query(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+
+        with self.assertNumQueries(1):
+            list(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE))
+
+    def test_with_perm_values(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+
+        # the permission subquery is only part of the filter, not of the rows
+        self.assertEqual(list(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE).values()), [
+            {'id': self.article.pk, 'name': self.article.name, 'text': self.article.text},
+        ])
+        self.assertEqual(
+            list(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE).values_list('pk')),
+            [(self.article.pk,)],
+        )
+
+    def test_with_perm_chained(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+        self.user.perms.add_perm(self._create_perm(self.article, enums.PERM_CODENAME_DELETE))
+        self.user.perms.add_perm(self._create_perm(self.article2))
+
+        articles = Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE).with_perm(
+            self.user, enums.PERM_CODENAME_DELETE,
+        )
+        self.assertEqual(list(articles), [self.article])
+
+    def test_with_perm_superuser(self):
+        self.user.is_superuser = True
+
+        self.assertEqual(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE).count(), 3)
+
+    def test_with_perm_anonymous_user(self):
+        self.assertEqual(Article.objects.with_perm(AnonymousUser(), enums.PERM_CODENAME_CHANGE).count(), 0)
+
+    def _get_flags(self, queryset):
+        return {
+            article.pk: (article.can_change, article.can_delete)
+            for article in queryset.annotate_perms(self.user, [enums.PERM_CODENAME_CHANGE, enums.PERM_CODENAME_DELETE])
+        }
+
+    def test_annotate_perms(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+        self.user.perms.add_perm(self._create_perm(self.article, enums.PERM_CODENAME_DELETE))
+        self.user.perms.add_perm(self._create_perm(self.article2, enums.PERM_CODENAME_DELETE))
+        UserFactory().perms.add_perm(self._create_perm(self.article3))
+
+        self.assertEqual(self._get_flags(Article.objects.all()), {
+            self.article.pk: (True, True),
+            self.article2.pk: (False, True),
+            self.article3.pk: (False, False),
+        })
+
+    def test_annotate_perms_single_query(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+
+        with self.assertNumQueries(1):
+            self._get_flags(Article.objects.all())
+
+    def test_annotate_perms_from_wildcard(self):
+        self.user.perms.add_perm(self._create_perm(self.article, enums.PERM_CODENAME_WILDCARD))
+        self.user.perms.add_perm(self._create_perm(self.article2, enums.PERM_CODENAME_WILDCARD))
+        # the perm takes precedence over the wildcard perm if it exists, as in ``has_perm``
+        self._create_perm(self.article2, enums.PERM_CODENAME_DELETE)
+
+        self.assertEqual(self._get_flags(Article.objects.all()), {
+            self.article.pk: (True, True),
+            self.article2.pk: (True, False),
+            self.article3.pk: (False, False),
+        })
+        self.assertFalse(self.user.perms.has_perm('object.articles.Article.delete', self.article2))
+
+    def test_annotate_perms_from_model_perm(self):
+        self.user.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.change')[0])
+        self.user.perms.add_perm(self._create_perm(self.article, enums.PERM_CODENAME_DELETE))
+
+        self.assertEqual(self._get_flags(Article.objects.all()), {
+            self.article.pk: (True, True),
+            self.article2.pk: (True, False),
+            self.article3.pk: (True, False),
+        })
+
+    def test_annotate_perms_from_model_wildcard_perm(self):
+        self.user.perms.add_perm(Perm.objects.create_from_str('model.articles.Article.*')[0])
+        Perm.objects.create_from_str('model.articles.Article.delete')
+
+        self.assertEqual(set(self._get_flags(Article.objects.all()).values()), {(True, False)})
+
+    def test_annotate_perms_chained(self):
+        self.user.perms.add_perm(self._create_perm(self.article))
+        self.user.perms.add_perm(self._create_perm(self.article2))
+
+        articles = Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE).filter(pk=self.article.pk)
+        self.assertEqual(self._get_flags(articles), {self.article.pk: (True, False)})
+
+    def test_annotate_perms_superuser(self):
+        self.user.is_superuser = True
+
+        self.assertEqual(set(self._get_flags(Article.objects.all()).values()), {(True, True)})
+
+    def test_annotate_perms_anonymous_user(self):
+        self.user = AnonymousUser()
+
+        self.assertEqual(set(self._get_flags(Article.objects.all()).values()), {(False, False)})
+
+    def test_fail_objects_for_user_non_object_perm(self):
+        with self.assertRaises(IncorrectPermType):
+            Perm.objects.objects_for_user(self.user, 'model.articles.Article.change')
+
+
+class ArticleGroupObjectQuerySetTestCase(ObjectQuerySetTestCaseMixin, ArticleGroupPermTestCase):
+
+    def test_with_perm_from_group(self):
+        self.group.perms.add_perm(self._create_perm(self.article))
+        self.user.perms.add_perm(self._create_perm(self.article2))
+
+        self.assertEqual(list(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE)), [self.article2])
+
+        self.user.groups.add(self.group)
+
+        self.assertEqual(
+            set(Article.objects.with_perm(self.user, enums.PERM_CODENAME_CHANGE)),
+            {self.article, self.article2},
+        )
+
+    def test_annotate_perms_from_group(self):
+        self.group.perms.add_perm(self._create_perm(self.article))
+        self.user.groups.add(self.group)
+
+        articles = Article.objects.annotate_perms(self.user, [enums.PERM_CODENAME_CHANGE])
+        self.assertEqual({article.pk: article.can_change for article in articles}, {
+            self.article.pk: True,
+            self.article2.pk: False,
+            self.article3.pk: False,
+        })
@@ -0,0 +1,103 @@
+from django.contrib.auth import get_user_model
+
+from fperms import enums
+from fperms.models import Perm
+from fperms.utils import get_perm
+
+from .base import ArticleTestCase, ArticleUserPermTestCase, ArticleGroupPermTestCase
+
+
+User = get_user_model()
+
+
+class ResolvePermTestCaseMixin:
+
+    def _create_perm(self, codename=enums.PERM_CODENAME_ADD):
+        return Perm.objects.create(
+            type=enums.PERM_TYPE_MODEL,
+            codename=codename,
+            content_type=self._get_content_type(),
+        )
+
+
+class ResolvePermTestCase(ResolvePermTestCaseMixin, ArticleTestCase):
+
+    def test_resolve_wildcard_single_query(self):
+        wildcard_perm = self._create_perm(enums.PERM_CODENAME_WILDCARD)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(get_perm('model.articles.Article.add'), wildcard_perm)
+
+    def test_resolve_exact_perm_before_wildcard(self):
+        self._create_perm(enums.PERM_CODENAME_WILDCARD)
+        perm = self._create_perm()
+
+        self.assertEqual(get_perm('model.articles.Article.add'), perm)
+
+    def test_fail_resolve_non_existent_single_query(self):
+        with self.assertNumQueries(1):
+            with self.assertRaises(Perm.DoesNotExist):
+                get_perm('model.articles.Article.add')
+
+
+class ArticleUserResolvePermTestCase(ResolvePermTestCaseMixin, ArticleUserPermTestCase):
+
+    def test_has_perm_single_query(self):
+        self.user.perms.add_perm(self._create_perm())
+        self.user.perms.add_perm(self._create_perm(enums.PERM_CODENAME_CHANGE))
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.perms.has_perm('model.articles.Article.add'))
+
+        # the effective permissions are loaded by the same query, held perms need no resolving
+        with self.assertNumQueries(0):
+            self.assertTrue(user.perms.has_perm('model.articles.Article.change'))
+
+    def test_fail_has_perm_not_held_no_query(self):
+        self.user.perms.add_perm(self._create_perm())
+        self._create_perm(enums.PERM_CODENAME_CHANGE)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.perms.has_perm('model.articles.Article.add'))
+        # neither the perm nor its wildcard perm is held, whether it exists does not matter
+        with self.assertNumQueries(0):
+            self.assertFalse(user.perms.has_perm('model.articles.Article.change'))
+            self.assertFalse(user.perms.has_perm('model.articles.Article.delete'))
+
+    def test_fail_has_perm_held_wildcard_overridden(self):
+        self.user.perms.add_perm(self._create_perm(enums.PERM_CODENAME_WILDCARD))
+        self._create_perm(enums.PERM_CODENAME_CHANGE)
+
+        user = User.objects.get(pk=self.user.pk)
+        self.assertTrue(user.perms.has_perm('model.articles.Article.add'))
+        # the perm takes precedence over the held wildcard perm if it exists, which needs resolving
+        with self.assertNumQueries(1):
+            self.assertFalse(user.perms.has_perm('model.articles.Article.change'))
+
+    def test_has_perm_from_wildcard_single_query(self):
+        self.user.perms.add_perm(self._create_perm(enums.PERM_CODENAME_WILDCARD))
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.perms.has_perm('model.articles.Article.delete'))
+
+    def test_fail_has_perm_non_existent_single_query(self):
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertFalse(user.perms.has_perm('model.articles.Article.delete'))
+
+
+class ArticleGroupResolvePermTestCase(ResolvePermTestCaseMixin, ArticleGroupPermTestCase):
+
+    def test_has_group_perm_single_query(self):
+        self.group.perms.add_perm(self._create_perm())
+        self.user.groups.add(self.group)
+
+        user = User.objects.get(pk=self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.perms.has_perm('model.articles.Article.add'))
+
+        change_perm = self._create_perm(enums.PERM_CODENAME_CHANGE)
+        with self.assertNumQueries(0):
+            self.assertFalse(user.perms.has_perm(change_perm))
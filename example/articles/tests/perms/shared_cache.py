@@ -0,0 +1,87 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import caches
+from django.test import override_settings
+
+from fperms import get_perm_model
+
+from .base import ArticleGroupPermTestCase
+
+
+Perm = get_perm_model()
+User = get_user_model()
+
+
+@override_settings(PERM_CACHE='default')
+class ArticleSharedPermCacheTestCase(ArticleGroupPermTestCase):
+
+    def setUp(self):
+        super().setUp()
+        caches['default'].clear()
+        self.perm = Perm.objects.create(
+            codename='export',
+        )
+
+    def _get_user(self):
+        # a fresh instance without permissions cached on it, as in another request or process
+        return User.objects.get(pk=self.user.pk)
+
+    def test_user_perms_shared_between_instances(self):
+        self.user.perms.add_perm(self.perm)
+
+        self.assertTrue(self._get_user().perms.has_perm(self.perm))
+
+        user = self._get_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.perms.has_perm(self.perm))
+
+    def test_group_perms_shared_between_instances(self):
+        self.group.perms.add_perm(self.perm)
+        self.user.groups.add(self.group)
+
+        self.assertTrue(self._get_user().perms.has_perm(self.perm))
+
+        user = self._get_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.perms.has_perm(self.perm))
+
+    def test_invalidated_on_user_perm_change(self):
+        self.assertFalse(self._get_user().perms.has_perm(self.perm))
+
+        self.user.perms.add_perm(self.perm)
+
+        self.assertTrue(self._get_user().perms.has_perm(self.perm))
+
+        self.perm.users.remove(self.user)
+
+        self.assertFalse(self._get_user().perms.has_perm(self.perm))
+
+    def test_invalidated_on_group_perm_change(self):
+        self.user.groups.add(self.group)
+
+        self.assertFalse(self._get_user().perms.has_perm(self.perm))
+
+        self.group.perms.add_perm(self.perm)
+
+        self.assertTrue(self._get_user().perms.has_perm(self.perm))
+
+    def test_invalidated_on_group_membership_change(self):
+        self.group.perms.add_perm(self.perm)
+
+        self.assertFalse(self._get_user().perms.has_perm(self.perm))
+
+        self.group.user_set.add(self.user)
+
+        self.assertTrue(self._get_user().perms.has_perm(self.perm))
+
+        self.group.delete()
+
+        self.assertFalse(self._get_user().perms.has_perm(self.perm))
+
+    def test_invalidated_on_perm_delete(self):
+        self.user.perms.add_perm(self.perm)
+
+        self.assertEqual(self._get_user().perms.all_perms().count(), 1)
+
+        self.perm.delete()
+
+        self.assertEqual(self._get_user().perms.all_perms().count(), 0)
@@ -6,6 +6,9 @@ from fperms.conf import settings
 from fperms.exceptions import ImproperlyConfigured
 
 
+default_app_config = 'fperms.apps.FPermsConfig'
+
+
 def get_perm_model():
     """
     Returns the Perm model that is active in this project.
@@ -1,8 +1,7 @@
 from django.contrib import admin
 from django.contrib.admin import ModelAdmin
 from django.contrib.admin.views.main import ChangeList
-
-from django.utils.functional import cached_property
+from django.db.models import Q
 
 from fperms import get_perm_model, enums
 from fperms.utils import get_content_type
@@ -10,6 +9,8 @@ from fperms.utils import get_content_type
 
 Perm = get_perm_model()
 
+ADMIN_PERM_CACHE_ATTR = '_fperms_admin_perm_cache'
+
 
 class Codename:
     ADD = 'add'
@@ -17,45 +18,78 @@ class Codename:
     DELETE = 'delete'
 
 
-class PermAdminMixin:
-
-    @cached_property
-    def _perms(self):
-        return Perm.objects.filter(content_type=get_content_type(self.model))
-
-
-class PermChangeList(PermAdminMixin, ChangeList):
+class PermChangeList(ChangeList):
 
     def get_queryset(self, request):
         qs = super().get_queryset(request)
 
-        # just in case there are objects lacking change permission
-        if request.user.is_superuser:
-            return qs.all()
-
-        object_ids = self._perms.filter(
-            object_id__isnull=False,
-            users__in=[request.user,],
-            codename='change',
-        ).values_list('object_id', flat=True)
+        # filter out objects lacking the change permission
+        return Perm.objects.filter_objects(qs, request.user, Codename.CHANGE)
 
-        return qs.filter(pk__in=object_ids)
 
-
-class PermModelAdmin(PermAdminMixin, ModelAdmin):
+class PermModelAdmin(ModelAdmin):
 
     perms_per_instance = False
     perms_per_instance_author_change = True
     perms_per_instance_author_delete = True
-
-    def save_model(self, request, obj, form, change):
-        super().save_model(request, obj, form, change)
+    perms_per_field = False
+
+    def get_field_perms(self, request):
+        # names of the fields of the model the user can view and change, resolved once per request
+        field_perms_cache = request.__dict__.setdefault('_fperms_field_perms_cache', {})
+        if self.model not in field_perms_cache:
+            field_perms_cache[self.model] = request.user.perms.field_perms(self.model)
+        return field_perms_cache[self.model]
+
+    def _get_perm_field_names(self):
+        # names of the model fields restricted by field permissions
+        opts = self.model._meta
+        fields = opts.concrete_fields + opts.many_to_many
+        return [field.name for field in fields if field.editable and not field.auto_created]
+
+    def get_readonly_fields(self, request, obj=None):
+        readonly_fields = list(super().get_readonly_fields(request, obj))
+        if not self.perms_per_field:
+            return readonly_fields
+
+        # fields the user can view but not change are shown read only
+        field_perms = self.get_field_perms(request)
+        view_only = field_perms[enums.PERM_CODENAME_VIEW] - field_perms[enums.PERM_CODENAME_CHANGE]
+        return readonly_fields + [
+            field_name for field_name in self._get_perm_field_names()
+            if field_name in view_only and field_name not in readonly_fields
+        ]
+
+    def get_exclude(self, request, obj=None):
+        exclude = super().get_exclude(request, obj)
+        if not self.perms_per_field:
+            return exclude
+
+        # fields the user can neither view nor change are left out of the form
+        field_perms = self.get_field_perms(request)
+        viewable = field_perms[enums.PERM_CODENAME_VIEW] | field_perms[enums.PERM_CODENAME_CHANGE]
+        exclude = list(exclude or ())
+        return exclude + [
+            field_name for field_name in self._get_perm_field_names()
+            if field_name not in viewable and field_name not in exclude
+        ]
+
+    def save_related(self, request, form, formsets, change):
+        super().save_related(request, form, formsets, change)
 
         # add the change and delete permissions for the author of a new model instance
         if not change and self.perms_per_instance:
-            for codename in (Codename.CHANGE, Codename.DELETE):
-                if hasattr(self, 'perms_per_instance_author_'+codename):
-                    self.add_perm(request.user, codename, obj)
+            self.provision_perms(request, [form.instance])
+
+    def provision_perms(self, request, objs):
+        # add the per-instance permissions of the objects for their author in bulk, e.g. for objects imported
+        # or created by an admin action, the objects are processed in chunks
+        codenames = [
+            codename for codename in (Codename.CHANGE, Codename.DELETE)
+            if getattr(self, 'perms_per_instance_author_' + codename)
+        ]
+        if codenames:
+            Perm.objects.provision_object_perms(objs, owner=request.user, codenames=codenames)
 
     def get_changelist(self, request, **kwargs):
         if self.perms_per_instance:
@@ -76,7 +110,7 @@ class PermModelAdmin(PermAdminMixin, ModelAdmin):
         return self.has_perm(request.user, Codename.DELETE)
 
     def add_perm(self, user, codename, obj):
-        object_id = obj.pk if obj is not None else None
+        object_id = Perm.get_object_id(obj) if obj is not None else None
         perm_kwargs = {
             'type': enums.PERM_TYPE_OBJECT,
             'content_type': get_content_type(self.model),
@@ -87,17 +121,54 @@ class PermModelAdmin(PermAdminMixin, ModelAdmin):
         perm, _ = Perm.objects.get_or_create(**perm_kwargs)
         user.perms.add(perm)
 
+    def get_admin_perms(self, user):
+        # keys of the model and object perms of the model held by the user and keys of the existing perms
+        # overriding its held wildcard perms, loaded once per user instance, i.e. once per request
+        # the held perms are taken from the permissions cached on the user, shared with ``PermBackend``
+        content_type = get_content_type(self.model)
+        admin_perm_cache = user.__dict__.setdefault(ADMIN_PERM_CACHE_ATTR, {})
+        if content_type.pk in admin_perm_cache:
+            return admin_perm_cache[content_type.pk]
+
+        perm_keys = {
+            perm_key for perm_key in user.perms.perm_keys()
+            if perm_key[0] in (enums.PERM_TYPE_MODEL, enums.PERM_TYPE_OBJECT) and perm_key[2] == content_type.pk
+        }
+        wildcard_keys = [perm_key for perm_key in perm_keys if perm_key[1] == enums.PERM_CODENAME_WILDCARD]
+        overriding_keys = set()
+        if wildcard_keys:
+            # a single query for the perms taking precedence over all the held wildcard perms
+            wildcards = Q(pk__in=[])
+            if any(perm_key[0] == enums.PERM_TYPE_MODEL for perm_key in wildcard_keys):
+                wildcards |= Q(type=enums.PERM_TYPE_MODEL, object_id__isnull=True)
+            object_ids = [perm_key[3] for perm_key in wildcard_keys if perm_key[0] == enums.PERM_TYPE_OBJECT]
+            if object_ids:
+                wildcards |= Q(type=enums.PERM_TYPE_OBJECT, object_id__in=object_ids)
+            overriding_keys = set(Perm.objects.filter(
+                wildcards,
+                content_type=content_type,
+                field_name__isnull=True,
+            ).exclude(
+                codename=enums.PERM_CODENAME_WILDCARD,
+            ).order_by().values_list(*Perm.PERM_KEY_FIELDS))
+
+        admin_perm_cache[content_type.pk] = perm_keys, overriding_keys
+        return admin_perm_cache[content_type.pk]
+
     def has_perm(self, user, codename=None, obj=None):
+        # model perm or object perm of the obj, resolved like ``user.perms.has_perm`` without any further query
         if user.is_superuser:
             return True
 
-        object_id = obj.pk if obj is not None else None
-
-        try:
-            perm = self._perms.get(codename=codename, object_id=object_id)
-            return user.perms.has_perm(perm)
-        except Perm.DoesNotExist:
-            return False
+        perm_keys, overriding_keys = self.get_admin_perms(user)
+        perm_type = enums.PERM_TYPE_OBJECT if obj is not None else enums.PERM_TYPE_MODEL
+        object_id = Perm.get_object_id(obj) if obj is not None else None
+        perm_key = (perm_type, codename, get_content_type(self.model).pk, object_id, None)
+        if perm_key in perm_keys:
+            return True
+        # the wildcard perm counts only if the perm itself does not exist
+        wildcard_key = (perm_type, enums.PERM_CODENAME_WILDCARD) + perm_key[2:]
+        return wildcard_key in perm_keys and perm_key not in overriding_keys
 
 
 class PermAdmin(ModelAdmin):
@@ -5,3 +5,6 @@ from django.apps import AppConfig
 class FPermsConfig(AppConfig):
     name = 'fperms'
 
+    def ready(self):
+        from fperms.signals import connect_signals
+        connect_signals()
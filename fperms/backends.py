@@ -1,46 +1,122 @@
-from django.apps import apps
 from django.contrib.auth.backends import ModelBackend
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
 
-from fperms import get_perm_model
-from fperms.utils import get_content_type
+from fperms import enums, get_perm_model
+from fperms.cache import perm_codename_registry
+from fperms.instrumentation import EVENT_BACKEND_CACHE_HIT, EVENT_BACKEND_CACHE_MISS, instrumented, record
+from fperms.utils import run_sync
 
 
 Perm = get_perm_model()
 
 
 def get_perm_from_permission_codename(permission_codename):
-    # get permission object based on django hard-coded permission codename
-    app_label, model_action = permission_codename.split('.', 1)
-    action, model_name = model_action.split('_')
-    model = apps.get_model(app_label, model_name)
-
-    return Perm.objects.get(
-        content_type=get_content_type(model),
-        codename=action,
-        object_id=None,
-        field_name=None,
-    )
+    # get model permission object based on django permission string, e.g. 'articles.change_article'
+    perm = perm_codename_registry.get(permission_codename)
+    if perm is None:
+        raise Perm.DoesNotExist('{} matching query does not exist.'.format(Perm._meta.object_name))
+    return perm
 
 
 class PermBackend(ModelBackend):
 
     # authentication backend, mostly for compatibility with django admin site
 
+    def _get_user_permissions(self, user_obj):
+        return Perm.objects.filter(users=user_obj)
+
+    def _get_group_permissions(self, user_obj):
+        # the related query name of the groups of the user depends on the user model, as in ModelBackend
+        user_groups_field = get_user_model()._meta.get_field('groups')
+        return Perm.objects.filter(**{'groups__{}'.format(user_groups_field.related_query_name()): user_obj})
+
+    def _get_model_permissions(self, perms):
+        # django permission strings of the model perms among perms in a single query
+        perms = perms.filter(
+            type=enums.PERM_TYPE_MODEL,
+            object_id__isnull=True,
+            field_name__isnull=True,
+        ).exclude(
+            codename=enums.PERM_CODENAME_WILDCARD,
+        ).order_by().values_list('content_type__app_label', 'codename', 'content_type__model')
+        return {'{}.{}_{}'.format(*perm) for perm in perms}
+
+    def _get_all_permissions(self, user_obj):
+        # derived from the permission keys cached on the user, so fperms checks and the backend share a single query
+        permissions = set()
+        for perm_type, codename, content_type_id, object_id, field_name in user_obj.perms.perm_keys():
+            if perm_type != enums.PERM_TYPE_MODEL or object_id is not None or field_name is not None:
+                continue
+            if codename == enums.PERM_CODENAME_WILDCARD:
+                continue
+            content_type = ContentType.objects.get_for_id(content_type_id)
+            permissions.add('{}.{}_{}'.format(content_type.app_label, codename, content_type.model))
+        return permissions
+
+    def _get_permissions(self, user_obj, obj, from_name):
+        # permissions of the user in the django format, e.g. 'articles.change_article', based on its model perms
+        # cached on the user like in ModelBackend, but under own attributes as both backends are usually enabled
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+
+        perm_cache_name = '_fperms_{}_perm_cache'.format(from_name)
+        if hasattr(user_obj, perm_cache_name):
+            record(EVENT_BACKEND_CACHE_HIT)
+        else:
+            record(EVENT_BACKEND_CACHE_MISS)
+            if user_obj.is_superuser:
+                permissions = self._get_model_permissions(Perm.objects.all())
+            elif from_name == 'all':
+                permissions = self._get_all_permissions(user_obj)
+            else:
+                permissions = self._get_model_permissions(
+                    getattr(self, '_get_{}_permissions'.format(from_name))(user_obj)
+                )
+            setattr(user_obj, perm_cache_name, permissions)
+        return getattr(user_obj, perm_cache_name)
+
+    def get_all_permissions(self, user_obj, obj=None):
+        return self._get_permissions(user_obj, obj, 'all')
+
+    @instrumented('backend.has_perm')
     def has_perm(self, user_obj, perm, obj=None):
         if user_obj.is_superuser:
             return True
+        if obj is None:
+            return perm in self.get_all_permissions(user_obj)
         try:
             perm_obj = get_perm_from_permission_codename(perm)
         except Perm.DoesNotExist:
             perm_obj = None
         return user_obj.perms.has_perm(perm_obj, obj)
 
+    async def ahas_perm(self, user_obj, perm, obj=None):
+        # async ``has_perm``, answered from memory once the permissions of the user are cached on it
+        if user_obj.is_superuser:
+            return True
+        if obj is None and hasattr(user_obj, '_fperms_all_perm_cache'):
+            return perm in self.get_all_permissions(user_obj)
+        return await run_sync(self.has_perm, user_obj, perm, obj)
+
+    def _get_module_perms(self, user_obj):
+        # app labels the user has any permission for directly or via its groups, cached on the user
+        # derived from the permission keys cached on the user like ``_get_all_permissions``
+        if hasattr(user_obj, '_fperms_module_perm_cache'):
+            record(EVENT_BACKEND_CACHE_HIT)
+        else:
+            record(EVENT_BACKEND_CACHE_MISS)
+            content_type_ids = {perm_key[2] for perm_key in user_obj.perms.perm_keys()} - {None}
+            user_obj._fperms_module_perm_cache = {
+                ContentType.objects.get_for_id(content_type_id).app_label for content_type_id in content_type_ids
+            }
+        return user_obj._fperms_module_perm_cache
+
+    @instrumented('backend.has_module_perms', perm_arg='app_label')
     def has_module_perms(self, user_obj, app_label):
         if not user_obj.is_active:
             return False
+        if user_obj.is_superuser:
+            return True
 
-        ctypes = ContentType.objects.filter(app_label=app_label)
-
-        return Perm.objects.filter(users__in=[user_obj,], content_type__in=ctypes)
+        return app_label in self._get_module_perms(user_obj)
@@ -1,24 +1,97 @@
-from functools import partialmethod
+from collections import namedtuple
+from copy import copy
+from functools import lru_cache, partialmethod
 
+import django
 from django.apps import apps
 from django.conf import settings
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
-from django.db import models
+from django.db import connection, models
 from django.db.models.base import ModelBase
 from django.utils.functional import cached_property
 from django.utils.translation import ugettext_lazy as _
 
 from fperms import enums
+from fperms.conf import settings as perm_settings
 from fperms.exceptions import ObjectNotPersisted, IncorrectContentType, IncorrectObject
 from fperms.managers import PermManager, RelatedPermManager
 
 
+ParsedPerm = namedtuple(
+    'ParsedPerm', ('type', 'codename', 'content_type', 'content_type_id', 'field_name', 'model'),
+)
+
+
+def _parse_perm(perm):
+    perm_type, perm_arg_string = perm.split('.', 1)
+
+    model = content_type = content_type_id = field_name = None
+
+    if perm_type == enums.PERM_TYPE_MODEL or perm_type == enums.PERM_TYPE_OBJECT:
+        model_name, codename = perm_arg_string.rsplit('.', 1)
+        model = apps.get_model(model_name)
+    elif perm_type == enums.PERM_TYPE_FIELD:
+        model_name, field_name, codename = perm_arg_string.rsplit('.', 2)
+        model = apps.get_model(model_name)
+    else:
+        codename = perm_arg_string
+
+    if model:
+        content_type = ContentType.objects.get_for_model(model)
+        content_type_id = content_type.pk
+
+    return ParsedPerm(perm_type, codename, content_type, content_type_id, field_name, model)
+
+
+class PermParser:
+
+    # parse a perm string into its object independent parts, memoized per perm string
+    # the memo is a LRU of ``PERM_PARSE_CACHE_SIZE`` perm strings built on the first parse, so the setting is read
+    # then rather than on import, it is rebuilt with the current setting once cleared via ``cache_clear``
+    # which is needed whenever apps or content types are reloaded
+
+    def __init__(self):
+        self.parse = None
+
+    def _get_parse(self):
+        parse = self.parse
+        if parse is None:
+            parse = self.parse = lru_cache(maxsize=perm_settings.PERM_PARSE_CACHE_SIZE)(_parse_perm)
+        return parse
+
+    def __call__(self, perm):
+        return self._get_parse()(perm)
+
+    def cache_clear(self):
+        self.parse = None
+
+    def cache_info(self):
+        return self._get_parse().cache_info()
+
+
+parse_perm = PermParser()
+
+
+def to_object_id(pk_field, pk):
+    # the pk as stored in the object_id field, the text of its database value, so it equals the pk cast to text
+    # by the database and objects with integer, UUID and string pks share the same column
+    if pk is None:
+        return None
+    return str(pk_field.get_db_prep_value(pk, connection))
+
+
 class PermMetaclass(ModelBase):
 
     def __new__(mcs, name, bases, attrs):
         new_class = super().__new__(mcs, name, bases, attrs)
+        opts = new_class._meta
+        if django.VERSION < (3, 0) and not opts.abstract:
+            # django < 3.0 does not interpolate names of indexes inherited from abstract models
+            opts.indexes = [copy(index) for index in opts.indexes]
+            for index in opts.indexes:
+                index.name = index.name % {'app_label': opts.app_label.lower(), 'class': name.lower()}
         for perm_type in new_class.PERM_TYPE_CHOICES:
             setattr(new_class, 'is_{}_perm'.format(perm_type[0]),
                     partialmethod(new_class.is_TYPE_perm, perm_type=perm_type[0]))
@@ -30,6 +103,8 @@ class BasePerm(models.Model, metaclass=PermMetaclass):
 
     PERM_TYPE_CHOICES = enums.PERM_TYPE_CHOICES
     PERM_CODENAMES = enums.PERM_CODENAMES
+    # fields uniquely identifying a permission, in the order used by permission keys
+    PERM_KEY_FIELDS = ('type', 'codename', 'content_type', 'object_id', 'field_name')
 
     type = models.CharField(
         max_length=10,
@@ -53,8 +128,9 @@ class BasePerm(models.Model, metaclass=PermMetaclass):
         blank=True,
         null=True,
     )
-    object_id = models.SmallIntegerField(
+    object_id = models.CharField(
         _('object pk'),
+        max_length=255,
         null=True,
         blank=True,
     )
@@ -86,6 +162,20 @@ class BasePerm(models.Model, metaclass=PermMetaclass):
         unique_together = (
             ('type', 'codename', 'content_type', 'object_id', 'field_name'),
         )
+        # named per perm model, e.g. 'fperms_perm_ct_obj_code_idx', index names are limited to 30 characters
+        indexes = [
+            # object permissions of a content type, e.g. filtering objects by permission or prefetching
+            models.Index(
+                fields=['content_type', 'object_id', 'codename'],
+                name='%(app_label)s_%(class)s_ct_obj_code_idx',
+            ),
+            # model and field permissions of a content type, the object_id of these is always null
+            models.Index(
+                fields=['content_type', 'codename'],
+                name='%(app_label)s_%(class)s_ct_code_null_idx',
+                condition=models.Q(object_id__isnull=True),
+            ),
+        ]
 
     def __str__(self):
         if self.name:
@@ -96,51 +186,82 @@ class BasePerm(models.Model, metaclass=PermMetaclass):
 
         return ' | '.join(('Permission', name, permission_name))
 
+    def save(self, *args, **kwargs):
+        self.object_id = self.get_stored_object_id()
+        super().save(*args, **kwargs)
+
+    @property
+    def perm_key(self):
+        # hashable key uniquely identifying the permission, see ``PERM_KEY_FIELDS``
+        object_id = self.object_id
+        if object_id is not None and not isinstance(object_id, str):
+            object_id = self.get_stored_object_id()
+        return self.type, self.codename, self.content_type_id, object_id, self.field_name
+
+    def get_stored_object_id(self):
+        # the object_id as stored in the database, ``content_object`` sets it to the pk of the object as is
+        if self.object_id is None:
+            return None
+        model = ContentType.objects.get_for_id(self.content_type_id).model_class() if self.content_type_id else None
+        if model is None:
+            return str(self.object_id)
+        return to_object_id(model._meta.pk, self.object_id)
+
     @cached_property
     def model(self):
         return self.content_type.model_class()
 
     @classmethod
     def get_perm_kwargs(cls, perm, obj=None):
-        perm_type, perm_arg_string = perm.split('.', 1)
-
-        model = content_type = object_id = field_name = None
-
-        if perm_type == enums.PERM_TYPE_MODEL or perm_type == enums.PERM_TYPE_OBJECT:
-            model_name, codename = perm_arg_string.rsplit('.', 1)
-            model = apps.get_model(model_name)
-            if perm_type == enums.PERM_TYPE_OBJECT:
-                if not isinstance(obj, models.Model):
-                    raise IncorrectObject(_('Object {} must be a model instance').format(obj))
-                if not isinstance(obj, model):
-                    raise IncorrectContentType(_('Object {} does not have a correct content type').format(obj))
-                if obj.pk is None:
-                    raise ObjectNotPersisted(_('Object {} needs to be persisted first').format(obj))
-
-                object_id = obj.pk
-        elif perm_type == enums.PERM_TYPE_FIELD:
-            model_name, field_name, codename = perm_arg_string.rsplit('.', 2)
-            model = apps.get_model(model_name)
-        else:
-            codename = perm_arg_string
-
-        if model:
-            content_type = ContentType.objects.get_for_model(model)
+        parsed_perm = parse_perm(perm)
+
+        object_id = None
+        if parsed_perm.type == enums.PERM_TYPE_OBJECT:
+            if not isinstance(obj, models.Model):
+                raise IncorrectObject(_('Object {} must be a model instance').format(obj))
+            if not isinstance(obj, parsed_perm.model):
+                raise IncorrectContentType(_('Object {} does not have a correct content type').format(obj))
+            if obj.pk is None:
+                raise ObjectNotPersisted(_('Object {} needs to be persisted first').format(obj))
+
+            object_id = cls.get_object_id(obj)
 
         return dict(
-            type=perm_type,
-            codename=codename,
-            content_type=content_type,
+            type=parsed_perm.type,
+            codename=parsed_perm.codename,
+            content_type=parsed_perm.content_type,
             object_id=object_id,
-            field_name=field_name,
+            field_name=parsed_perm.field_name,
+        )
+
+    @classmethod
+    def get_object_id(cls, obj):
+        # get the pk of the object as stored in the object_id field
+        return to_object_id(obj._meta.pk, obj.pk)
+
+    @classmethod
+    def get_perm_key(cls, perm, obj=None):
+        # get the permission key of a perm string, see ``PERM_KEY_FIELDS``
+        return cls.get_perm_kwargs_key(cls.get_perm_kwargs(perm, obj))
+
+    @staticmethod
+    def get_perm_kwargs_key(perm_kwargs):
+        # get the permission key of perm kwargs, see ``PERM_KEY_FIELDS``
+        content_type = perm_kwargs['content_type']
+        return (
+            perm_kwargs['type'],
+            perm_kwargs['codename'],
+            content_type.pk if content_type is not None else None,
+            perm_kwargs['object_id'],
+            perm_kwargs['field_name'],
         )
 
     def get_wildcard_perm(self):
-        return self.objects.filter(
+        return type(self).objects.filter(
             type=self.type,
             codename=enums.PERM_CODENAME_WILDCARD,
             content_type=self.content_type,
-            object_id=self.object_id,
+            object_id=self.get_stored_object_id(),
             field_name=self.field_name,
         )
 
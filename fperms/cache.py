@@ -0,0 +1,276 @@
+import time
+from collections import OrderedDict, namedtuple
+from threading import Lock
+
+from django.core.cache import caches
+
+from fperms import enums, get_perm_model
+from fperms.conf import settings
+from fperms.instrumentation import EVENT_LRU_CACHE_HIT, EVENT_LRU_CACHE_MISS, record
+
+
+PERM_CACHE_ATTR = '_fperms_perm_cache'
+
+PERM_CACHE_GENERATION_KEY = 'fperms:generation'
+PERM_CACHE_MODEL_PERMS_GENERATION_KEY = 'fperms:generation:model_perms'
+PERM_CACHE_PERMS_GENERATION_KEY = 'fperms:generation:perms'
+PERM_CACHE_USER_KEY = 'fperms:user:{}'
+PERM_CACHE_GROUP_KEY = 'fperms:group:{}'
+
+
+def get_cached_perms(instance):
+    # get the effective permissions cached on a user or group instance, None if not loaded yet
+    return getattr(instance, PERM_CACHE_ATTR, None)
+
+
+def set_cached_perms(instance, perms):
+    setattr(instance, PERM_CACHE_ATTR, perms)
+    return perms
+
+
+def clear_cached_perms(instance):
+    # drop the effective permissions cached on a user or group instance
+    instance.__dict__.pop(PERM_CACHE_ATTR, None)
+
+
+def _new_generation():
+    # start from the current time, so a generation evicted from the cache is never reused
+    return int(time.time() * 1000)
+
+
+def _get_generation(cache, key):
+    generation = cache.get(key)
+    if generation is None:
+        cache.add(key, _new_generation(), timeout=None)
+        generation = cache.get(key)
+    return generation
+
+
+class SharedPermCache:
+
+    # permissions cached across processes via the django cache framework
+    # every entry is stored under the current generation used as the cache key version,
+    # bumping the generation invalidates all entries at once
+
+    def __init__(self, cache):
+        self.cache = cache
+        self.version = self.get_generation()
+
+    def get_generation(self):
+        return _get_generation(self.cache, PERM_CACHE_GENERATION_KEY)
+
+    def get(self, key):
+        return self.cache.get(key, version=self.version)
+
+    def get_many(self, keys):
+        return self.cache.get_many(keys, version=self.version)
+
+    def set(self, key, value):
+        self.cache.set(key, value, timeout=settings.PERM_CACHE_TIMEOUT, version=self.version)
+
+    def set_many(self, data):
+        self.cache.set_many(data, timeout=settings.PERM_CACHE_TIMEOUT, version=self.version)
+
+
+def get_shared_cache():
+    # get the shared permission cache, None if disabled
+    if settings.PERM_CACHE is None:
+        return None
+    return SharedPermCache(caches[settings.PERM_CACHE])
+
+
+def get_generation(key=PERM_CACHE_GENERATION_KEY):
+    # the current generation of the shared permission cache, None if disabled
+    if settings.PERM_CACHE is None:
+        return None
+    return _get_generation(caches[settings.PERM_CACHE], key)
+
+
+def bump_generation(key=PERM_CACHE_GENERATION_KEY):
+    # invalidate all permissions cached in the shared cache
+    # perms cached in every process are invalidated separately via ``PERM_CACHE_PERMS_GENERATION_KEY``
+    # and ``PERM_CACHE_MODEL_PERMS_GENERATION_KEY``, bumped only once perms are saved or deleted
+    if settings.PERM_CACHE is None:
+        return
+    cache = caches[settings.PERM_CACHE]
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, _new_generation(), timeout=None)
+
+
+# returned by ``PermLRUCache.get`` for keys not cached
+PERM_NOT_CACHED = object()
+
+PermLRUCacheInfo = namedtuple('PermLRUCacheInfo', ('hits', 'misses', 'maxsize', 'currsize'))
+
+
+class PermLRUCache:
+
+    # bounded in-process cache of perms resolved from permission keys, see ``PERM_KEY_FIELDS``
+    # a key maps to the field values of the resolved perm, which may be its wildcard perm, every lookup returns
+    # a new instance, so threads never share one, perms which do not exist are not cached
+    # entries expire after ``PERM_LRU_CACHE_TIMEOUT`` seconds and, if the shared cache is enabled, are dropped
+    # once perms are saved or deleted in other processes, checked at most once per ``PERM_LRU_CACHE_TIMEOUT``
+
+    def __init__(self):
+        self.lock = Lock()
+        self.data = OrderedDict()
+        self.generation = None
+        self.next_validation = float('-inf')
+        self.hits = self.misses = 0
+
+    def _validate(self):
+        # drop all entries cached under a previous generation of the perms, the shared cache is not queried
+        # on every lookup, grants and revokes do not change the generation as resolved perms do not depend on them
+        now = time.monotonic()
+        if now < self.next_validation:
+            return
+        timeout = settings.PERM_LRU_CACHE_TIMEOUT
+        generation = get_generation(PERM_CACHE_PERMS_GENERATION_KEY)
+        with self.lock:
+            self.next_validation = now + timeout if timeout is not None else now
+            if generation != self.generation:
+                self.data.clear()
+                self.generation = generation
+
+    def get(self, perm_key, default=PERM_NOT_CACHED):
+        self._validate()
+        with self.lock:
+            pk, values, expires = self.data.get(perm_key, (None, None, None))
+            if expires is not None and expires < time.monotonic():
+                del self.data[perm_key]
+                values = None
+            if values is None:
+                self.misses += 1
+                record(EVENT_LRU_CACHE_MISS)
+                return default
+            self.data.move_to_end(perm_key)
+            self.hits += 1
+        record(EVENT_LRU_CACHE_HIT)
+        perm_model = get_perm_model()
+        return perm_model.from_db(None, [field.attname for field in perm_model._meta.concrete_fields], values)
+
+    def set(self, perm_key, perm):
+        maxsize = settings.PERM_LRU_CACHE_SIZE
+        if not maxsize or perm is None:
+            return
+        timeout = settings.PERM_LRU_CACHE_TIMEOUT
+        expires = time.monotonic() + timeout if timeout is not None else float('inf')
+        values = tuple(getattr(perm, field.attname) for field in perm._meta.concrete_fields)
+        self._validate()
+        with self.lock:
+            self.data[perm_key] = perm.pk, values, expires
+            self.data.move_to_end(perm_key)
+            while len(self.data) > maxsize:
+                self.data.popitem(last=False)
+
+    def evict(self, perm):
+        # evict all entries which might resolve differently once the perm is saved or deleted
+        # these are the perm key itself, keys resolved to the perm and for wildcards all keys falling back to it
+        self.evict_many([perm])
+
+    def evict_many(self, perms):
+        # evict the entries of all the perms in a single pass over the cache, e.g. after a bulk insert
+        codenames_by_target = {}
+        pks = set()
+        for perm in perms:
+            perm_type, codename, content_type_id, object_id, field_name = perm.perm_key
+            codenames_by_target.setdefault((perm_type, content_type_id, object_id, field_name), set()).add(codename)
+            pks.add(perm.pk)
+        if not pks:
+            return
+
+        with self.lock:
+            for perm_key, (pk, values, expires) in list(self.data.items()):
+                codenames = codenames_by_target.get(perm_key[:1] + perm_key[2:], ())
+                if perm_key[1] in codenames or enums.PERM_CODENAME_WILDCARD in codenames:
+                    del self.data[perm_key]
+                elif pk in pks:
+                    del self.data[perm_key]
+        # other processes drop their entries on their next validation
+        bump_generation(PERM_CACHE_PERMS_GENERATION_KEY)
+
+    def clear(self):
+        with self.lock:
+            self.data.clear()
+            self.next_validation = float('-inf')
+            self.hits = self.misses = 0
+
+    def info(self):
+        return PermLRUCacheInfo(self.hits, self.misses, settings.PERM_LRU_CACHE_SIZE, len(self.data))
+
+
+perm_lru_cache = PermLRUCache()
+
+
+class PermCodenameRegistry:
+
+    # model perms by django permission strings, e.g. 'articles.change_article', loaded in a single query on first use
+    # cleared whenever a model perm is saved or deleted, the next lookup reloads it, model perms saved or deleted
+    # in other processes are picked up within ``PERM_LRU_CACHE_TIMEOUT`` seconds, the registry is reloaded
+    # once expired or, if the shared cache is enabled, once expired and the generation of model perms has changed
+
+    def __init__(self):
+        self.lock = Lock()
+        self.perms = None
+        self.generation = None
+        self.expires = float('-inf')
+        self.version = 0
+
+    def get(self, permission_codename):
+        perms = self.perms
+        if perms is None or time.monotonic() >= self.expires:
+            perms = self.refresh()
+        return perms.get(permission_codename)
+
+    def _get_expires(self):
+        timeout = settings.PERM_LRU_CACHE_TIMEOUT
+        if timeout is None:
+            # without the shared cache the registry never expires, with it the generation is checked on every lookup
+            return float('inf') if settings.PERM_CACHE is None else float('-inf')
+        return time.monotonic() + timeout
+
+    def refresh(self):
+        # the shared cache is queried at most once per timeout rather than for every permission string
+        perms = self.perms
+        generation = get_generation(PERM_CACHE_MODEL_PERMS_GENERATION_KEY)
+        if perms is not None and generation is not None and generation == self.generation:
+            self.expires = self._get_expires()
+            return perms
+        return self.load(generation)
+
+    def load(self, generation=None):
+        version = self.version
+        perms = get_perm_model().objects.filter(
+            type=enums.PERM_TYPE_MODEL,
+            object_id__isnull=True,
+            field_name__isnull=True,
+        ).exclude(
+            codename=enums.PERM_CODENAME_WILDCARD,
+        ).select_related('content_type')
+        perms = {
+            '{}.{}_{}'.format(perm.content_type.app_label, perm.codename, perm.content_type.model): perm
+            for perm in perms
+        }
+        with self.lock:
+            # do not keep perms loaded before the registry got cleared
+            if version == self.version:
+                self.perms = perms
+                self.generation = generation
+                self.expires = self._get_expires()
+        return perms
+
+    def evict(self, perms):
+        # clear the registry once any of the perms saved or deleted is a model perm
+        if any(perm.type == enums.PERM_TYPE_MODEL for perm in perms):
+            self.clear()
+            bump_generation(PERM_CACHE_MODEL_PERMS_GENERATION_KEY)
+
+    def clear(self):
+        with self.lock:
+            self.perms = None
+            self.version += 1
+
+
+perm_codename_registry = PermCodenameRegistry()
@@ -6,6 +6,12 @@ DEFAULTS = {
     'PERM_CODENAMES': {},
     'PERM_MODEL': 'fperms.Perm',
     'PERM_AUTO_CREATE': False,
+    'PERM_CACHE': None,
+    'PERM_CACHE_TIMEOUT': 60 * 60,
+    'PERM_PARSE_CACHE_SIZE': 1024,
+    'PERM_LRU_CACHE_SIZE': 1024,
+    'PERM_LRU_CACHE_TIMEOUT': 60,
+    'PERM_EFFECTIVE_PERMS': False,
 }
 
 
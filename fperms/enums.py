@@ -5,12 +5,14 @@ from django.utils.translation import ugettext_lazy as _
 PERM_CODENAME_ADD = 'add'
 PERM_CODENAME_CHANGE = 'change'
 PERM_CODENAME_DELETE = 'delete'
+PERM_CODENAME_VIEW = 'view'
 PERM_CODENAME_WILDCARD = '*'
 
 DEFAULT_PERM_CODENAMES = {
     PERM_CODENAME_ADD: _('add'),
     PERM_CODENAME_CHANGE: _('change'),
     PERM_CODENAME_DELETE: _('delete'),
+    PERM_CODENAME_VIEW: _('view'),
     PERM_CODENAME_WILDCARD: _('wildcard'),
 }
 
@@ -29,3 +31,13 @@ DEFAULT_PERM_TYPE_CHOICES = (
 )
 
 PERM_TYPE_CHOICES = DEFAULT_PERM_TYPE_CHOICES + settings.PERM_TYPE_CHOICES
+
+HAS_PERMS_MODE_ALL = 'all'
+HAS_PERMS_MODE_ANY = 'any'
+HAS_PERMS_MODE_MAP = 'map'
+
+HAS_PERMS_MODES = (
+    HAS_PERMS_MODE_ALL,
+    HAS_PERMS_MODE_ANY,
+    HAS_PERMS_MODE_MAP,
+)
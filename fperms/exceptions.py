@@ -14,5 +14,9 @@ class IncorrectContentType(PermError):
     pass
 
 
+class IncorrectPermType(PermError):
+    pass
+
+
 class ImproperlyConfigured(PermError):
     pass
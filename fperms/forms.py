@@ -0,0 +1,23 @@
+from fperms import enums
+
+
+class PermFieldsFormMixin:
+
+    # model form mixin restricting its fields to the field permissions of the user, e.g. ``ArticleForm(user=user)``
+    # fields the user can neither view nor change are removed, fields the user can only view are disabled
+
+    def __init__(self, *args, user=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if user is not None:
+            self.apply_field_perms(user)
+
+    def apply_field_perms(self, user):
+        field_perms = user.perms.field_perms(self._meta.model)
+        changeable = field_perms[enums.PERM_CODENAME_CHANGE]
+        viewable = field_perms[enums.PERM_CODENAME_VIEW] | changeable
+
+        for field_name in list(self.fields):
+            if field_name not in viewable:
+                del self.fields[field_name]
+            elif field_name not in changeable:
+                self.fields[field_name].disabled = True
@@ -0,0 +1,229 @@
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from functools import wraps
+from inspect import signature
+from threading import Lock, local
+
+from django.db import connections
+from django.dispatch import Signal
+
+
+# sent with ``check`` once an instrumented permission check finishes, checks are instrumented only
+# while the signal has receivers, e.g. ``perm_checked.connect(receiver)`` or ``record_perm_checks()``
+perm_checked = Signal()
+
+EVENT_PERMS_CACHE_HIT = 'perms_cache_hit'
+EVENT_PERMS_CACHE_MISS = 'perms_cache_miss'
+EVENT_LRU_CACHE_HIT = 'lru_cache_hit'
+EVENT_LRU_CACHE_MISS = 'lru_cache_miss'
+EVENT_PREFETCH_HIT = 'prefetch_hit'
+EVENT_BACKEND_CACHE_HIT = 'backend_cache_hit'
+EVENT_BACKEND_CACHE_MISS = 'backend_cache_miss'
+EVENT_WILDCARD_FALLBACK = 'wildcard_fallback'
+EVENT_DOES_NOT_EXIST = 'does_not_exist'
+
+_active = local()
+
+
+class PermCheck:
+
+    # a single instrumented permission check, nested checks, e.g. ``get_perm`` called by ``has_perm``,
+    # are sent as well and their cost is included in the outer check
+
+    def __init__(self, source, perm, obj, nested):
+        self.source = source
+        self.perm = perm
+        self.obj = obj
+        self.nested = nested
+        self.result = None
+        self.error = None
+        self.duration = 0.0
+        self.queries = 0
+        self.events = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        # counts queries executed during the check, see ``connection.execute_wrapper``
+        self.queries += 1
+        return execute(sql, params, many, context)
+
+
+def _active_checks():
+    checks = getattr(_active, 'checks', None)
+    if checks is None:
+        checks = _active.checks = []
+    return checks
+
+
+def record(event):
+    # record an event, e.g. a cache hit, for all checks in progress in the current thread
+    for check in getattr(_active, 'checks', ()):
+        check.events[event] += 1
+
+
+def instrumented(source, perm_arg='perm'):
+    # decorator instrumenting a permission check taking the perm argument and optionally ``obj``
+
+    def decorator(func):
+        func_signature = signature(func)
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not perm_checked.receivers:
+                counter = getattr(_active, 'counter', None)
+                if counter is None:
+                    return func(*args, **kwargs)
+                return counter.count(func, *args, **kwargs)
+
+            arguments = func_signature.bind(*args, **kwargs).arguments
+            checks = _active_checks()
+            check = PermCheck(source, arguments.get(perm_arg), arguments.get('obj'), nested=bool(checks))
+            checks.append(check)
+            start = time.perf_counter()
+            try:
+                with ExitStack() as stack:
+                    for connection in connections.all():
+                        stack.enter_context(connection.execute_wrapper(check))
+                    check.result = func(*args, **kwargs)
+                return check.result
+            except Exception as e:
+                check.error = e
+                raise
+            finally:
+                check.duration = time.perf_counter() - start
+                checks.pop()
+                counter = getattr(_active, 'counter', None)
+                if counter is not None and not check.nested:
+                    counter.add(check.queries)
+                perm_checked.send(sender=source, check=check)
+
+        return wrapper
+
+    return decorator
+
+
+class PermCounter:
+
+    # lightweight counts of the permission checks done in a thread and of the queries they ran, see
+    # ``count_perm_checks``, nested checks are not counted separately
+
+    def __init__(self):
+        self.checks = 0
+        self.cached_checks = 0
+        self.queries = 0
+        self.depth = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        # counts queries executed during checks, see ``connection.execute_wrapper``
+        if self.depth:
+            self.queries += 1
+        return execute(sql, params, many, context)
+
+    def add(self, queries):
+        self.checks += 1
+        self.queries += queries
+        if not queries:
+            self.cached_checks += 1
+
+    def count(self, func, *args, **kwargs):
+        if self.depth:
+            return func(*args, **kwargs)
+        queries = self.queries
+        self.depth += 1
+        try:
+            return func(*args, **kwargs)
+        finally:
+            self.depth -= 1
+            check_queries = self.queries - queries
+            self.queries = queries
+            self.add(check_queries)
+
+    def merge(self, counter):
+        # add the counts of a counter nested within this one
+        self.checks += counter.checks
+        self.cached_checks += counter.cached_checks
+        self.queries += counter.queries
+
+    def as_dict(self):
+        return {'checks': self.checks, 'cached_checks': self.cached_checks, 'queries': self.queries}
+
+
+class PermStats:
+
+    # in-memory aggregation of instrumented checks, a receiver of ``perm_checked``
+    # totals only count outermost checks, so the cost of nested checks is not counted twice
+
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.checks = 0
+        self.cached_checks = 0
+        self.queries = 0
+        self.duration = 0.0
+        self.events = Counter()
+        self.perms = Counter()
+        self.sources = {}
+
+    def __call__(self, sender, check, **kwargs):
+        with self.lock:
+            source = self.sources.setdefault(check.source, {'checks': 0, 'queries': 0, 'duration': 0.0})
+            source['checks'] += 1
+            source['queries'] += check.queries
+            source['duration'] += check.duration
+            if check.nested:
+                return
+            self.checks += 1
+            if not check.queries:
+                self.cached_checks += 1
+            self.queries += check.queries
+            self.duration += check.duration
+            self.events.update(check.events)
+            self.perms[str(check.perm)] += 1
+
+    def most_common(self, n=None):
+        # the most frequently checked perms with their counts
+        with self.lock:
+            return self.perms.most_common(n)
+
+    def as_dict(self):
+        with self.lock:
+            return {
+                'checks': self.checks,
+                'cached_checks': self.cached_checks,
+                'queries': self.queries,
+                'duration': self.duration,
+                'events': dict(self.events),
+                'perms': dict(self.perms),
+                'sources': {source: dict(stats) for source, stats in self.sources.items()},
+            }
+
+
+@contextmanager
+def count_perm_checks():
+    # count permission checks done in the current thread within the block, unlike ``record_perm_checks``
+    # only a query counter is installed for the whole block and checks are not measured one by one
+    # blocks may be nested, the checks of a nested block are counted by the enclosing block as well
+    previous = getattr(_active, 'counter', None)
+    counter = _active.counter = PermCounter()
+    try:
+        with ExitStack() as stack:
+            for connection in connections.all():
+                stack.enter_context(connection.execute_wrapper(counter))
+            yield counter
+    finally:
+        _active.counter = previous
+        if previous is not None:
+            previous.merge(counter)
+
+
+@contextmanager
+def record_perm_checks(stats=None):
+    # aggregate permission checks done within the block, e.g. ``with record_perm_checks() as stats: ...``
+    stats = stats if stats is not None else PermStats()
+    perm_checked.connect(stats, weak=False, dispatch_uid=id(stats))
+    try:
+        yield stats
+    finally:
+        perm_checked.disconnect(dispatch_uid=id(stats))
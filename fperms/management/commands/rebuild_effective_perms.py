@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from fperms.models import EffectivePerm
+
+
+class Command(BaseCommand):
+
+    help = 'Rebuilds the effective permissions of all users from the permissions of users and groups'
+
+    def handle(self, *args, **options):
+        count = EffectivePerm.objects.rebuild()
+        self.stdout.write('Rebuilt {} effective permissions'.format(count))
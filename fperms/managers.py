@@ -1,14 +1,58 @@
 from functools import partialmethod
+from itertools import islice
+from types import MappingProxyType
 
-from django.db import models
+import django
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.db import models, transaction
+from django.db.models import Exists, OuterRef, Q, Value
+from django.db.models.functions import Cast
+from django.utils.translation import ugettext_lazy as _
 
 from fperms import get_perm_model, enums
-from fperms.utils import get_perm
+from fperms.cache import (
+    PERM_CACHE_USER_KEY, PERM_CACHE_GROUP_KEY, PERM_NOT_CACHED, get_cached_perms, set_cached_perms,
+    get_shared_cache, bump_generation, perm_codename_registry, perm_lru_cache,
+)
+from fperms.conf import settings
+from fperms.exceptions import IncorrectPermType
+from fperms.instrumentation import EVENT_PERMS_CACHE_HIT, EVENT_PERMS_CACHE_MISS, instrumented, record
+from fperms.utils import (
+    SynchronousOnlyOperation, get_perm, get_content_type, get_cached_perm, get_resolve_kwargs, record_resolved_perm,
+    run_sync, select_perm,
+)
 
 
 PERM_USER_SLUG = 'users'
 PERM_GROUP_SLUG = 'groups'
 
+PERM_OBJECTS_ANNOTATION = 'fperms_has_perm'
+PERM_FLAG_ANNOTATION = 'can_{}'
+BULK_BATCH_SIZE = 1000
+PROVISIONED_CODENAMES = (enums.PERM_CODENAME_CHANGE, enums.PERM_CODENAME_DELETE)
+FIELD_PERM_CODENAMES = (enums.PERM_CODENAME_VIEW, enums.PERM_CODENAME_CHANGE)
+
+
+def get_m2m_through(m2m):
+    # through model of a many-to-many relation and the attnames of its source and target fields
+    field = m2m.field
+    return field.remote_field.through, field.m2m_column_name(), field.m2m_reverse_name()
+
+
+def get_pks(objs):
+    # pks of model instances or pks
+    return [getattr(obj, 'pk', obj) for obj in objs]
+
+
+def batched(items, batch_size=BULK_BATCH_SIZE):
+    # lists of at most batch_size items, consuming the items lazily
+    items = iter(items)
+    batch = list(islice(items, batch_size))
+    while batch:
+        yield batch
+        batch = list(islice(items, batch_size))
+
 
 class PermManagerMetaclass(type):
 
@@ -42,15 +86,254 @@ class PermManager(models.Manager, metaclass=PermManagerMetaclass):
         perm_kwargs = get_perm_model().get_perm_kwargs(perm, obj)
         return self.create(**perm_kwargs)
 
-    def create_from_str(self, perms, obj=None):
+    def _bulk_create_from_str(self, perms, obj):
+        return self._bulk_create_perm_kwargs([get_perm_model().get_perm_kwargs(perm, obj) for perm in perms])
+
+    def _bulk_create_perm_kwargs(self, targets):
+        # create the perms missing out of the perm kwargs in a single statement, existing perms are kept
+        if not targets:
+            return []
+        perm_keys = [self.model.get_perm_kwargs_key(perm_kwargs) for perm_kwargs in targets]
+
+        with transaction.atomic(using=self.db):
+            existing_perms = {perm.perm_key: perm for perm in self._filter_perm_kwargs(targets)}
+            missing = {}
+            for perm_key, perm_kwargs in zip(perm_keys, targets):
+                if perm_key not in existing_perms:
+                    missing.setdefault(perm_key, perm_kwargs)
+            if missing:
+                self.bulk_create([self.model(**perm_kwargs) for perm_kwargs in missing.values()],
+                                 batch_size=BULK_BATCH_SIZE)
+                # primary keys are not set by bulk_create on every database, the created perms are fetched back
+                created_perms = list(self._filter_perm_kwargs(list(missing.values())))
+                existing_perms.update((perm.perm_key, perm) for perm in created_perms)
+
+        if missing:
+            # bulk_create does not send post_save, which invalidates the caches otherwise
+            perm_lru_cache.evict_many(created_perms)
+            perm_codename_registry.evict(created_perms)
+            bump_generation()
+        return [existing_perms[perm_key] for perm_key in perm_keys]
+
+    def create_from_str(self, perms, obj=None, bulk=False):
+        # create perms from perm strings, in bulk mode atomically in a single statement skipping existing perms
+        # the perms are returned in the order of the perm strings
         if isinstance(perms, str):
             perms = [perms]
 
+        if bulk:
+            return self._bulk_create_from_str(perms, obj)
+
         obj_perms = []
         for perm in perms:
             obj_perms.append(self._create_from_str(perm, obj))
         return obj_perms
 
+    def _filter_perm_kwargs(self, targets, wildcard=False):
+        # filter perms matching any of the perm kwargs, and their wildcard perms if required, in a single query
+        # perms are looked up by codenames and object ids per type, content type and field
+        lookups = {}
+        for perm_kwargs in targets:
+            codenames, object_ids = lookups.setdefault(
+                (perm_kwargs['type'], perm_kwargs['content_type'], perm_kwargs['field_name']), (set(), set()),
+            )
+            codenames.add(perm_kwargs['codename'])
+            if wildcard:
+                codenames.add(enums.PERM_CODENAME_WILDCARD)
+            object_ids.add(perm_kwargs['object_id'])
+        query = Q()
+        for (perm_type, content_type, field_name), (codenames, object_ids) in lookups.items():
+            object_query = Q(object_id__in=object_ids - {None})
+            if None in object_ids:
+                object_query |= Q(object_id__isnull=True)
+            query |= Q(object_query, type=perm_type, content_type=content_type, field_name=field_name,
+                       codename__in=codenames)
+        return self.filter(query).order_by()
+
+    def _resolve_perms(self, perms, objs=None):
+        # resolve perms, for each of the objects if given, in a single query, the same way as ``get_perm``
+        if isinstance(perms, (str, self.model)):
+            perms = [perms]
+
+        resolved_perms = [perm for perm in perms if isinstance(perm, self.model)]
+        targets = [
+            self.model.get_perm_kwargs(perm, obj)
+            for perm in perms if not isinstance(perm, self.model)
+            for obj in (objs if objs is not None else [None])
+        ]
+        if not targets:
+            return resolved_perms
+
+        perms_by_target = {}
+        for perm in self._filter_perm_kwargs(targets, wildcard=True):
+            perm_type, codename, *target = perm.perm_key
+            perms_by_target.setdefault((perm_type, *target), {})[codename] = perm
+        for perm_kwargs in targets:
+            perm_key = self.model.get_perm_kwargs_key(perm_kwargs)
+            perm = select_perm(self.model, perm_kwargs, perms_by_target.get(perm_key[:1] + perm_key[2:], {}))
+            if perm is None:
+                raise self.model.DoesNotExist('{} matching query does not exist.'.format(self.model._meta.object_name))
+            resolved_perms.append(perm)
+        return resolved_perms
+
+    def _send_perms_changed(self, action, perms, users, groups, grants=None):
+        from fperms.signals import perms_changed
+        perms_changed.send(sender=self.model, action=action, perms=perms, users=users, groups=groups, grants=grants)
+
+    def grant(self, perms, users=(), groups=(), objs=None):
+        # grant perms, for each of the objects if given, to all the users and groups in bulk
+        # sends a single ``perms_changed`` signal instead of ``m2m_changed`` for every user and group
+        perms = self._resolve_perms(perms, objs)
+        perm_pks = {perm.pk for perm in perms}
+        users, groups = list(users), list(groups)
+        for m2m, related in ((self.model.users, users), (self.model.groups, groups)):
+            through, perm_attname, related_attname = get_m2m_through(m2m)
+            through.objects.bulk_create(
+                (
+                    through(**{perm_attname: perm_pk, related_attname: related_pk})
+                    for related_pk in get_pks(related) for perm_pk in perm_pks
+                ),
+                batch_size=BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+        self._send_perms_changed('grant', perms, users, groups)
+        return perms
+
+    def revoke(self, perms, users=(), groups=(), objs=None):
+        # revoke perms, for each of the objects if given, from all the users and groups in bulk
+        perms = self._resolve_perms(perms, objs)
+        perm_pks = {perm.pk for perm in perms}
+        users, groups = list(users), list(groups)
+        for m2m, related in ((self.model.users, users), (self.model.groups, groups)):
+            through, perm_attname, related_attname = get_m2m_through(m2m)
+            for related_pks in batched(get_pks(related)):
+                through.objects.filter(**{
+                    '{}__in'.format(perm_attname): perm_pks,
+                    '{}__in'.format(related_attname): related_pks,
+                }).delete()
+        self._send_perms_changed('revoke', perms, users, groups)
+        return perms
+
+    def provision_object_perms(self, objs, owner=None, codenames=PROVISIONED_CODENAMES):
+        # create object perms with the codenames for each of the objects and grant them to the owner, if any,
+        # the owner is either a user or a callable returning the owner of an object
+        # objects are processed in chunks, so any number of them, e.g. an iterator over a queryset, can be provisioned
+        for chunk in batched(objs):
+            targets = [
+                self.model.get_perm_kwargs('{}.{}.{}'.format(enums.PERM_TYPE_OBJECT, obj._meta.label, codename), obj)
+                for obj in chunk for codename in codenames
+            ]
+            perms = self._bulk_create_perm_kwargs(targets)
+            if owner is None:
+                continue
+
+            # perms of each owner, the perms of an object follow each other
+            owners, perms_by_owner = {}, {}
+            for index, obj in enumerate(chunk):
+                obj_owner = owner(obj) if callable(owner) else owner
+                if obj_owner is not None:
+                    owners[obj_owner.pk] = obj_owner
+                    perms_by_owner.setdefault(obj_owner.pk, []).extend(
+                        perms[index * len(codenames):(index + 1) * len(codenames)]
+                    )
+
+            grants = [
+                (user_pk, perm.pk) for user_pk, owner_perms in perms_by_owner.items() for perm in owner_perms
+            ]
+            through, perm_attname, user_attname = get_m2m_through(self.model.users)
+            through.objects.bulk_create(
+                (through(**{perm_attname: perm_pk, user_attname: user_pk}) for user_pk, perm_pk in grants),
+                batch_size=BULK_BATCH_SIZE,
+                ignore_conflicts=True,
+            )
+            # a single signal for all the owners of the chunk, each of them is granted only the perms of its objects
+            owner_perms = [perm for perms in perms_by_owner.values() for perm in perms]
+            self._send_perms_changed('grant', owner_perms, list(owners.values()), [], grants=grants)
+
+    def for_user(self, user):
+        # filter perms granted to the user directly or via its groups
+        if settings.PERM_EFFECTIVE_PERMS:
+            # a single indexed lookup regardless of the number of groups of the user
+            effective_perms = apps.get_model('fperms', 'EffectivePerm').objects.filter(user=user)
+            return self.filter(pk__in=effective_perms.values('perm'))
+        # subqueries on the through tables instead of joins, each of them is driven by the index of the user
+        user_perms, perm_attname, user_attname = get_m2m_through(self.model.users)
+        group_perms, group_perm_attname, group_attname = get_m2m_through(self.model.groups)
+        user_groups, member_attname, member_group_attname = get_m2m_through(get_user_model().groups)
+        user_group_pks = user_groups.objects.filter(**{member_attname: user.pk}).values(member_group_attname)
+        held_perms = Q(pk__in=user_perms.objects.filter(**{user_attname: user.pk}).values(perm_attname))
+        held_perms |= Q(pk__in=group_perms.objects.filter(
+            **{'{}__in'.format(group_attname): user_group_pks}
+        ).values(group_perm_attname))
+        return self.filter(held_perms)
+
+    def filter_objects(self, queryset, user, codename):
+        # filter the queryset to objects the user has the object permission with the codename for
+        # either directly, via its groups or via the wildcard object permission
+        if user.is_superuser:
+            return queryset.all()
+        if user.pk is None:
+            return queryset.none()
+
+        # a correlated subquery keeps the filter a single statement regardless of the table size
+        perm_exists = self._held_perm_exists(user, get_content_type(queryset.model), codename, model_perms=False)
+        if django.VERSION >= (3, 0):
+            return queryset.filter(perm_exists)
+
+        # django < 3.0 filters by annotations only, they are kept out of the rows via a subquery of the pks
+        objects = queryset.model._base_manager.annotate(**{PERM_OBJECTS_ANNOTATION: perm_exists})
+        return queryset.filter(pk__in=objects.filter(**{PERM_OBJECTS_ANNOTATION: True}).values('pk'))
+
+    def _held_perm_exists(self, user, content_type, codename, model_perms=True):
+        # a subquery of the held object perm with the codename of an outer row or, if model_perms is set,
+        # of the held model perm, the wildcard perm counts only if the perm itself does not exist,
+        # so the result matches ``has_perm``
+        perms = self.filter(content_type=content_type, codename=codename, field_name__isnull=True)
+        # object ids are stored as text, the pk of the outer row is cast to match, see ``to_object_id``
+        target_perms = Q(type=enums.PERM_TYPE_OBJECT, object_id=Cast(OuterRef('pk'), models.CharField()))
+        resolved_perms = Q(codename=codename) | Q(type=enums.PERM_TYPE_OBJECT, object_perm_exists=False)
+        annotations = {
+            'object_perm_exists': Exists(perms.filter(type=enums.PERM_TYPE_OBJECT, object_id=OuterRef('object_id'))),
+        }
+        if model_perms:
+            target_perms |= Q(type=enums.PERM_TYPE_MODEL, object_id__isnull=True)
+            resolved_perms |= Q(type=enums.PERM_TYPE_MODEL, model_perm_exists=False)
+            annotations['model_perm_exists'] = Exists(perms.filter(type=enums.PERM_TYPE_MODEL, object_id__isnull=True))
+
+        held_perms = self.for_user(user).filter(
+            target_perms,
+            content_type=content_type,
+            codename__in=(codename, enums.PERM_CODENAME_WILDCARD),
+            field_name__isnull=True,
+        ).annotate(**annotations).filter(resolved_perms)
+        return Exists(held_perms.values('pk'))
+
+    def annotate_objects(self, queryset, user, codenames):
+        # annotate the queryset with a boolean ``can_<codename>`` flag for each of the codenames, set if the user
+        # has the object permission with the codename directly, via its groups, via the wildcard object permission
+        # or via the model permission, computed by the database in the query fetching the objects
+        if user.is_superuser or user.pk is None:
+            flag = Value(bool(user.is_superuser), output_field=models.BooleanField())
+            return queryset.annotate(**{PERM_FLAG_ANNOTATION.format(codename): flag for codename in codenames})
+
+        content_type = get_content_type(queryset.model)
+        return queryset.annotate(**{
+            PERM_FLAG_ANNOTATION.format(codename): self._held_perm_exists(user, content_type, codename)
+            for codename in codenames
+        })
+
+    def objects_for_user(self, user, perm, queryset=None):
+        # get objects the user has the object permission for, e.g. 'object.articles.Article.change'
+        perm_type, perm_arg_string = perm.split('.', 1)
+        if perm_type != enums.PERM_TYPE_OBJECT:
+            raise IncorrectPermType(_('Permission {} must be an object permission').format(perm))
+
+        model_name, codename = perm_arg_string.rsplit('.', 1)
+        if queryset is None:
+            queryset = apps.get_model(model_name)._default_manager.all()
+
+        return self.filter_objects(queryset, user, codename)
+
     def TYPE_perms(self, perm_type):
         # return all perms of the specified type
         # used to generate magical helper methods in the metaclass
@@ -59,18 +342,120 @@ class PermManager(models.Manager, metaclass=PermManagerMetaclass):
 
 class RelatedPermManager(models.Manager):
 
+    def _perm_keys(self, perms):
+        # map keys of the perms to their pks
+        perms = perms.order_by().values_list('pk', *self.model.PERM_KEY_FIELDS)
+        return {tuple(perm[1:]): perm[0] for perm in perms}
+
+    def _load_perms(self):
+        # map keys of all permissions of related group or user to their pks in a single query
+        return self._perm_keys(self._held_perms())
+
+    def _load_group_perms(self, shared_cache, group_pks):
+        # get permissions of each group from the shared cache, load the missing ones in a single query
+        cache_keys = {PERM_CACHE_GROUP_KEY.format(pk): pk for pk in group_pks}
+        cached = shared_cache.get_many(cache_keys)
+        group_perms = {cache_keys[cache_key]: perm_keys for cache_key, perm_keys in cached.items()}
+
+        missing_pks = set(group_pks) - set(group_perms)
+        if missing_pks:
+            for group_pk in missing_pks:
+                group_perms[group_pk] = {}
+            perms = self.model.objects.filter(groups__in=missing_pks).values_list(
+                'groups', 'pk', *self.model.PERM_KEY_FIELDS
+            )
+            for perm in perms:
+                group_perms[perm[0]][tuple(perm[2:])] = perm[1]
+            shared_cache.set_many({PERM_CACHE_GROUP_KEY.format(pk): group_perms[pk] for pk in missing_pks})
+
+        return group_perms
+
+    def _load_shared_perms(self, shared_cache):
+        # users are cached with their direct permissions and group pks, groups with their permissions
+        if self.query_field_name != PERM_USER_SLUG:
+            return dict(self._load_group_perms(shared_cache, [self.instance.pk])[self.instance.pk])
+
+        cache_key = PERM_CACHE_USER_KEY.format(self.instance.pk)
+        user_perms = shared_cache.get(cache_key)
+        if user_perms is None:
+            user_perms = (self._perm_keys(self.all()), list(self.instance.groups.values_list('pk', flat=True)))
+            shared_cache.set(cache_key, user_perms)
+
+        perm_keys, group_pks = user_perms
+        perm_keys = dict(perm_keys)
+        for group_perm_keys in self._load_group_perms(shared_cache, group_pks).values():
+            perm_keys.update(group_perm_keys)
+        return perm_keys
+
+    def _get_perms(self):
+        # effective permissions are cached on the related instance itself, related managers are
+        # created anew on every ``instance.perms`` access and would not keep them between checks
+        perm_keys = get_cached_perms(self.instance)
+        if perm_keys is not None:
+            record(EVENT_PERMS_CACHE_HIT)
+        else:
+            record(EVENT_PERMS_CACHE_MISS)
+            shared_cache = get_shared_cache()
+            if shared_cache is not None:
+                perm_keys = self._load_shared_perms(shared_cache)
+            else:
+                perm_keys = self._load_perms()
+            set_cached_perms(self.instance, perm_keys)
+        return perm_keys
+
     def all_perms(self):
         # get all permissions for related group or user
-        all_perms_cache_name = 'all_perms_cache'
-        if not hasattr(self, all_perms_cache_name):
-            perm_pks = set(self.all().values_list('pk', flat=True))
-            # If the related object is a user, add permissions from its groups
-            if self.query_field_name == PERM_USER_SLUG:
-                for group in self.instance.groups.all():
-                    perm_pks.update(set(group.perms.all().values_list('pk', flat=True)))
+        if get_cached_perms(self.instance) is None and settings.PERM_CACHE is None:
+            # a single query instead of loading the perm keys first
+            return self._held_perms()
+        return self.model.objects.filter(pk__in=self._get_perms().values())
+
+    def perm_keys(self):
+        # read-only mapping of keys of all permissions for related group or user to their pks
+        # much more compact than perm instances, loaded once and cached like the permission checks
+        return MappingProxyType(self._get_perms())
+
+    def field_perms(self, model, codenames=FIELD_PERM_CODENAMES):
+        # map each of the codenames to names of the fields of the model related group or user has the field
+        # permission with the codename for, directly, via groups or via the wildcard field permission
+        # all field permissions of the model with the codenames are resolved in a single query
+        if hasattr(self.instance, 'is_superuser') and self.instance.is_superuser:
+            opts = model._meta
+            field_names = {field.name for field in opts.concrete_fields + opts.many_to_many}
+            return {codename: set(field_names) for codename in codenames}
 
-            setattr(self, all_perms_cache_name, self.model.objects.filter(pk__in=perm_pks))
-        return getattr(self, all_perms_cache_name)
+        perms = self.model.objects.filter(
+            type=enums.PERM_TYPE_FIELD,
+            content_type=get_content_type(model),
+            codename__in=set(codenames) | {enums.PERM_CODENAME_WILDCARD},
+            object_id__isnull=True,
+        )
+        perm_keys = get_cached_perms(self.instance)
+        if perm_keys is None:
+            held_perms = self._held_perms().values('pk')
+            perms = perms.annotate(is_held=Exists(held_perms.filter(pk=OuterRef('pk'))))
+            perms = perms.order_by().values_list('field_name', 'codename', 'is_held')
+        else:
+            # held perms are known from the cached permissions, only existing perms are queried
+            held_pks = set(perm_keys.values())
+            perms = [
+                (field_name, codename, pk in held_pks)
+                for field_name, codename, pk in perms.order_by().values_list('field_name', 'codename', 'pk')
+            ]
+
+        # the perm takes precedence over the wildcard perm of a field if it exists, as in ``has_perm``
+        perms = {(field_name, codename): is_held for field_name, codename, is_held in perms}
+        field_perms = {codename: set() for codename in codenames}
+        for (field_name, codename), is_held in perms.items():
+            if not is_held:
+                continue
+            if codename != enums.PERM_CODENAME_WILDCARD:
+                field_perms[codename].add(field_name)
+                continue
+            for field_codename, field_names in field_perms.items():
+                if (field_name, field_codename) not in perms:
+                    field_names.add(field_name)
+        return field_perms
 
     def get_perms(self, *perms, obj=None):
         obj_perms = []
@@ -84,22 +469,330 @@ class RelatedPermManager(models.Manager):
     def remove_perm(self, *perms, obj=None):
         return self.remove(*self.get_perms(*perms, obj=obj))
 
+    def _held_perms(self):
+        # perms held by related group or user, for users including perms of its groups
+        if self.query_field_name == PERM_USER_SLUG:
+            return self.model.objects.for_user(self.instance)
+        return self.model.objects.filter(groups=self.instance)
+
+    def _load_perms_resolving(self, perm_kwargs):
+        # load all permissions of related group or user and resolve the perm kwargs in a single query
+        held_perms = self._held_perms().values('pk')
+        opts = self.model._meta
+        field_names = [field.attname for field in opts.concrete_fields]
+        pk_index = field_names.index(opts.pk.attname)
+        key_indexes = [field_names.index(opts.get_field(name).attname) for name in self.model.PERM_KEY_FIELDS]
+        perms = self.model.objects.filter(
+            Q(pk__in=held_perms) | Q(**get_resolve_kwargs(perm_kwargs)),
+        ).annotate(
+            is_held=Exists(held_perms.filter(pk=OuterRef('pk'))),
+        ).values_list('is_held', *field_names)
+
+        wildcard_key = self.model.get_perm_kwargs_key(dict(perm_kwargs, codename=enums.PERM_CODENAME_WILDCARD))
+        resolve_keys = (self.model.get_perm_kwargs_key(perm_kwargs), wildcard_key)
+        perm_keys = {}
+        resolved_perms = {}
+        for is_held, *values in perms:
+            perm_key = tuple(values[index] for index in key_indexes)
+            if is_held:
+                perm_keys[perm_key] = values[pk_index]
+            if perm_key in resolve_keys:
+                perm = self.model.from_db(self.db, field_names, values)
+                resolved_perms[perm.codename] = perm
+
+        set_cached_perms(self.instance, perm_keys)
+        perm = select_perm(self.model, perm_kwargs, resolved_perms)
+        perm_lru_cache.set(resolve_keys[0], perm)
+        return perm
+
     def get_perm(self, perm, obj=None):
         # get a permission if it belongs to group or user
-        perm = get_perm(perm, obj)
+        nothing_cached = get_cached_perms(self.instance) is None and settings.PERM_CACHE is None
+        if nothing_cached and not isinstance(perm, self.model):
+            perm_kwargs = self.model.get_perm_kwargs(perm, obj)
+            perm = get_cached_perm(perm_kwargs, obj)
+            if perm is PERM_NOT_CACHED:
+                # nothing is cached yet, load permissions and resolve the perm in a single query
+                perm = self._load_perms_resolving(perm_kwargs)
+            record_resolved_perm(perm_kwargs, perm)
+            if perm is None:
+                raise self.model.DoesNotExist('{} matching query does not exist.'.format(self.model._meta.object_name))
+        else:
+            perm = get_perm(perm, obj)
 
-        return self.all_perms().get(pk=perm.pk)
+        if perm.perm_key not in self._get_perms():
+            raise self.model.DoesNotExist('{} matching query does not exist.'.format(self.model._meta.object_name))
+        return perm
 
+    @instrumented('has_perm')
     def has_perm(self, perm, obj=None):
         # determine whether a user or a group has provided permission
+        # answered from the cached permissions where possible, see ``_has_cached_perm``
+        result = self._has_cached_perm(perm, obj)
+        if result is not None:
+            return result
+        try:
+            self.get_perm(perm, obj)
+        except get_perm_model().DoesNotExist:
+            return False
+
+        return True
+
+    def has_perms(self, perms, obj=None, mode=enums.HAS_PERMS_MODE_ALL):
+        # determine whether a user or a group has provided permissions, resolving all of them in a single query
+        # returns a bool for 'all' and 'any' modes or a dict of perm -> bool for 'map' mode
+        if mode not in enums.HAS_PERMS_MODES:
+            raise ValueError('Invalid mode "{}", expected one of {}'.format(mode, ', '.join(enums.HAS_PERMS_MODES)))
+
+        # perms are iterated more than once, a generator would be exhausted by the first pass
+        perms = list(perms)
         if hasattr(self.instance, 'is_superuser') and self.instance.is_superuser:
-            return True
+            results = {perm: True for perm in perms}
+        else:
+            results = self._has_perms(perms, obj)
+        return self._has_perms_result(results, mode)
+
+    def _has_perms_result(self, results, mode):
+        if mode == enums.HAS_PERMS_MODE_ALL:
+            return all(results.values())
+        if mode == enums.HAS_PERMS_MODE_ANY:
+            return any(results.values())
+        return results
+
+    def _has_perms(self, perms, obj):
+        perm_keys = {}
+        perm_kwargs_by_key = {}
+        query = Q()
+        for perm in perms:
+            if perm is None:
+                continue
+            if isinstance(perm, self.model):
+                perm_keys[perm] = perm.perm_key
+                continue
+            perm_kwargs = self.model.get_perm_kwargs(perm, obj)
+            perm_key = self.model.get_perm_kwargs_key(perm_kwargs)
+            perm_keys[perm] = perm_key
+            perm_kwargs_by_key[perm_key] = perm_kwargs
+            perm_type, codename, content_type_id, object_id, field_name = perm_key
+            query |= Q(
+                type=perm_type,
+                codename__in=(codename, enums.PERM_CODENAME_WILDCARD),
+                content_type_id=content_type_id,
+                object_id=object_id,
+                field_name=field_name,
+            )
+
+        # permission strings resolve to an existing perm or its wildcard in case it does not exist
+        existing_keys = set()
+        nothing_cached = get_cached_perms(self.instance) is None and settings.PERM_CACHE is None
+        if query and nothing_cached:
+            # load all permissions of related group or user along with the existing perms in a single query
+            held_perms = self._held_perms().values('pk')
+            perms_query = self.model.objects.filter(Q(pk__in=held_perms) | query).annotate(
+                is_held=Exists(held_perms.filter(pk=OuterRef('pk'))),
+            ).order_by().values_list('is_held', 'pk', *self.model.PERM_KEY_FIELDS)
+            held_keys = {}
+            for is_held, pk, *perm_key in perms_query:
+                existing_keys.add(tuple(perm_key))
+                if is_held:
+                    held_keys[tuple(perm_key)] = pk
+            set_cached_perms(self.instance, held_keys)
+        elif query:
+            existing_keys = set(self.model.objects.filter(query).values_list(*self.model.PERM_KEY_FIELDS))
+
+        if settings.PERM_AUTO_CREATE:
+            # create the missing perms as ``has_perm`` does, they take precedence over their wildcard perms then
+            missing = [
+                perm_kwargs for perm_key, perm_kwargs in perm_kwargs_by_key.items() if perm_key not in existing_keys
+            ]
+            if missing:
+                self.model.objects._bulk_create_perm_kwargs(missing)
+                existing_keys.update(self.model.get_perm_kwargs_key(perm_kwargs) for perm_kwargs in missing)
 
+        granted_keys = self._get_perms()
+        results = {}
+        for perm in perms:
+            perm_key = perm_keys.get(perm)
+            if perm_key is not None and not isinstance(perm, self.model):
+                perm_key = self._resolve_perm_key(perm_key, existing_keys)
+            results[perm] = perm_key is not None and perm_key in granted_keys
+        return results
+
+    def _resolve_perm_key(self, perm_key, existing_keys):
+        # same as ``fperms.utils.get_perm``, fall back to the wildcard perm if the exact one does not exist
+        if perm_key in existing_keys:
+            return perm_key
+        wildcard_key = (perm_key[0], enums.PERM_CODENAME_WILDCARD) + perm_key[2:]
+        if wildcard_key in existing_keys:
+            return wildcard_key
+        return None
+
+    def _resolve_cached_perm(self, perm, obj=None):
+        # resolve a perm without any query, ``PERM_NOT_CACHED`` unless both the resolved perm
+        # and the permissions of related group or user are cached, None for perms which do not exist
+        if get_cached_perms(self.instance) is None:
+            return PERM_NOT_CACHED
+        if isinstance(perm, self.model):
+            return perm
+        try:
+            return get_cached_perm(self.model.get_perm_kwargs(perm, obj), obj)
+        except SynchronousOnlyOperation:
+            # the content type of the perm is not cached yet
+            return PERM_NOT_CACHED
+
+    def _has_cached_perm(self, perm, obj=None):
+        # answer ``has_perm`` without any query, None if not possible
+        if hasattr(self.instance, 'is_superuser') and self.instance.is_superuser:
+            return True
         if perm is None:
             return False
+        perm_keys = get_cached_perms(self.instance)
+        if perm_keys is None:
+            return None
+        record(EVENT_PERMS_CACHE_HIT)
+        if isinstance(perm, self.model):
+            return perm.perm_key in perm_keys
         try:
-            self.get_perm(perm, obj)
-        except get_perm_model().DoesNotExist:
+            perm_kwargs = self.model.get_perm_kwargs(perm, obj)
+        except SynchronousOnlyOperation:
+            # the content type of the perm is not cached yet
+            return None
+
+        # held perms exist, so a held perm key resolves to the perm itself
+        perm_key = self.model.get_perm_kwargs_key(perm_kwargs)
+        if perm_key in perm_keys:
+            return True
+        # whichever perm the key resolves to, it is not held unless its wildcard perm is
+        wildcard_key = (perm_key[0], enums.PERM_CODENAME_WILDCARD) + perm_key[2:]
+        if wildcard_key not in perm_keys and not settings.PERM_AUTO_CREATE:
             return False
 
-        return True
+        perm = get_cached_perm(perm_kwargs, obj)
+        if perm is PERM_NOT_CACHED:
+            return None
+        return perm is not None and perm.perm_key in perm_keys
+
+    # async counterparts of the permission checks, answered from memory if the perms are cached,
+    # e.g. once loaded by ``aload_perms`` or a previous check, otherwise run in a thread via ``sync_to_async``
+
+    async def aload_perms(self):
+        # load and cache the effective permissions of related group or user
+        await run_sync(self._get_perms)
+
+    async def aget_perm(self, perm, obj=None):
+        resolved_perm = self._resolve_cached_perm(perm, obj)
+        if resolved_perm is PERM_NOT_CACHED:
+            return await run_sync(self.get_perm, perm, obj)
+        if resolved_perm is None or resolved_perm.perm_key not in get_cached_perms(self.instance):
+            raise self.model.DoesNotExist('{} matching query does not exist.'.format(self.model._meta.object_name))
+        return resolved_perm
+
+    async def ahas_perm(self, perm, obj=None):
+        result = self._has_cached_perm(perm, obj)
+        if result is None:
+            return await run_sync(self.has_perm, perm, obj)
+        return result
+
+    async def ahas_perms(self, perms, obj=None, mode=enums.HAS_PERMS_MODE_ALL):
+        if mode not in enums.HAS_PERMS_MODES:
+            raise ValueError('Invalid mode "{}", expected one of {}'.format(mode, ', '.join(enums.HAS_PERMS_MODES)))
+        perms = list(perms)
+        results = {perm: self._has_cached_perm(perm, obj) for perm in perms}
+        if None in results.values():
+            return await run_sync(self.has_perms, perms, obj, mode)
+        return self._has_perms_result(results, mode)
+
+    async def aadd_perm(self, *perms, obj=None):
+        return await run_sync(self.add_perm, *perms, obj=obj)
+
+
+class PermQuerySetMixin:
+
+    # queryset mixin for models with object permissions
+
+    def with_perm(self, user, codename):
+        # filter objects the user has the object permission with the codename for
+        return get_perm_model().objects.filter_objects(self, user, codename)
+
+    def annotate_perms(self, user, codenames):
+        # annotate objects with ``can_<codename>`` flags of the user, e.g. ``can_change`` and ``can_delete``
+        return get_perm_model().objects.annotate_objects(self, user, codenames)
+
+
+class PermQuerySet(PermQuerySetMixin, models.QuerySet):
+    pass
+
+
+class EffectivePermManager(models.Manager):
+
+    # maintains the denormalized effective permissions of users, see ``PERM_EFFECTIVE_PERMS``
+    # rows granted via a group keep the group as their source, so revoking one group keeps grants of the others
+
+    def _create(self, rows):
+        # rows are consumed in batches, so only a batch of them is held in memory at a time
+        for batch in batched(rows):
+            self.bulk_create(
+                [
+                    self.model(user_id=user_pk, perm_id=perm_pk, group_id=group_pk)
+                    for user_pk, perm_pk, group_pk in batch
+                ],
+                ignore_conflicts=True,
+            )
+
+    def _filter(self, user_pks=None, perm_pks=None, group_pks=None, **kwargs):
+        # None stands for any user, perm or group
+        if user_pks is not None:
+            kwargs['user__in'] = user_pks
+        if perm_pks is not None:
+            kwargs['perm__in'] = perm_pks
+        if group_pks is not None:
+            kwargs['group__in'] = group_pks
+        return self.filter(**kwargs)
+
+    def grant_direct(self, user_pks, perm_pks):
+        # direct grants have no group, already existing rows conflict with the unique direct grant constraint
+        self._create((user_pk, perm_pk, None) for user_pk in user_pks for perm_pk in perm_pks)
+
+    def grant_direct_pairs(self, grants):
+        # grant each of the perms to its user only, given as (user pk, perm pk) pairs
+        self._create((user_pk, perm_pk, None) for user_pk, perm_pk in grants)
+
+    def revoke_direct(self, user_pks=None, perm_pks=None):
+        self._filter(user_pks, perm_pks, group__isnull=True).delete()
+
+    def grant_group(self, group_pks, perm_pks):
+        # grant the perms to all members of the groups
+        through, user_attname, group_attname = get_m2m_through(get_user_model().groups)
+        members = through.objects.filter(**{'{}__in'.format(group_attname): group_pks}).values_list(
+            user_attname, group_attname
+        )
+        self._create((user_pk, perm_pk, group_pk) for user_pk, group_pk in members for perm_pk in perm_pks)
+
+    def revoke_group(self, group_pks=None, perm_pks=None):
+        self._filter(perm_pks=perm_pks, group_pks=group_pks, group__isnull=False).delete()
+
+    def join_groups(self, user_pks, group_pks):
+        # grant the perms of the groups to their new members
+        through, perm_attname, group_attname = get_m2m_through(get_perm_model().groups)
+        perm_groups = through.objects.filter(**{'{}__in'.format(group_attname): group_pks}).values_list(
+            group_attname, perm_attname
+        )
+        self._create((user_pk, perm_pk, group_pk) for group_pk, perm_pk in perm_groups for user_pk in user_pks)
+
+    def leave_groups(self, user_pks=None, group_pks=None):
+        self._filter(user_pks=user_pks, group_pks=group_pks, group__isnull=False).delete()
+
+    def rebuild(self):
+        # rebuild all effective permissions from the permissions of users and groups, returns the number of rows
+        through, perm_attname, user_attname = get_m2m_through(get_perm_model().users)
+        direct = through.objects.values_list(user_attname, perm_attname)
+        through, user_attname, group_attname = get_m2m_through(get_user_model().groups)
+        group_field = get_user_model().groups.field.m2m_reverse_field_name()
+        via_groups = through.objects.filter(**{'{}__perms__isnull'.format(group_field): False}).values_list(
+            user_attname, '{}__perms'.format(group_field), group_attname
+        )
+        with transaction.atomic(using=self.db):
+            self.all().delete()
+            self._create((user_pk, perm_pk, None) for user_pk, perm_pk in direct.iterator())
+            self._create(via_groups.iterator())
+            return self.count()
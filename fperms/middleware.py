@@ -0,0 +1,31 @@
+import logging
+
+from fperms.instrumentation import count_perm_checks
+
+
+logger = logging.getLogger('fperms')
+
+
+class PermMiddleware:
+
+    # request scoped permission checks, must come after ``AuthenticationMiddleware``
+    # the effective permissions of the authenticated user are loaded on its first check and cached on
+    # ``request.user``, every later fperms and ``PermBackend`` check in the request is answered from them
+    # checks of the request are counted in ``request.perm_stats`` and logged to the 'fperms' logger,
+    # the number of checks served without a query is ``request.perm_stats.cached_checks``
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # ``request.user`` is not touched here, requests without any check load no permissions
+        with count_perm_checks() as stats:
+            request.perm_stats = stats
+            response = self.get_response(request)
+
+        if stats.checks:
+            logger.debug(
+                '%s %s: permission checks %d, served without a query %d, queries %d',
+                request.method, request.path, stats.checks, stats.cached_checks, stats.queries,
+            )
+        return response
@@ -0,0 +1,32 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:46
+
+from django.db import migrations, models
+import django.db.models.manager
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fperms', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='perm',
+            options={'base_manager_name': 'related_manager', 'ordering': ('content_type', 'object_id', 'field_name', 'codename'), 'verbose_name': 'permission', 'verbose_name_plural': 'permissions'},
+        ),
+        migrations.AlterModelManagers(
+            name='perm',
+            managers=[
+                ('related_manager', django.db.models.manager.Manager()),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='perm',
+            index=models.Index(fields=['content_type', 'object_id', 'codename'], name='fperms_perm_ct_obj_code_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='perm',
+            index=models.Index(condition=models.Q(('object_id__isnull', True)), fields=['content_type', 'codename'], name='fperms_perm_ct_code_null_idx'),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fperms', '0002_perm_indexes'),
+    ]
+
+    operations = [
+        # object pks of any type are stored as text, see fperms.base.to_object_id
+        migrations.AlterField(
+            model_name='perm',
+            name='object_id',
+            field=models.CharField(blank=True, max_length=255, null=True, verbose_name='object pk'),
+        ),
+    ]
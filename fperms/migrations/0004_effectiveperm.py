@@ -0,0 +1,34 @@
+# Generated by Django 3.2.25 on 2026-10-18 08:50
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+import fperms.conf
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('auth', '0008_alter_user_username_max_length'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        migrations.swappable_dependency(fperms.conf.settings.PERM_MODEL),
+        ('fperms', '0003_perm_object_id'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='EffectivePerm',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('group', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='auth.group')),
+                ('perm', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=fperms.conf.settings.PERM_MODEL)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'effective permission',
+                'verbose_name_plural': 'effective permissions',
+                'unique_together': {('user', 'perm', 'group')},
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 3.2.25 on 2026-10-18 09:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('fperms', '0004_effectiveperm'),
+    ]
+
+    operations = [
+        migrations.AddConstraint(
+            model_name='effectiveperm',
+            constraint=models.UniqueConstraint(condition=models.Q(('group__isnull', True)), fields=('user', 'perm'), name='fperms_effectiveperm_direct_uniq'),
+        ),
+    ]
@@ -1,10 +1,41 @@
+from django.conf import settings
+from django.contrib.auth.models import Group
+from django.db import models
+from django.utils.translation import ugettext_lazy as _
+
 from fperms.base import BasePerm
-from fperms.managers import RelatedPermManager
+from fperms.conf import settings as perm_settings
+from fperms.managers import EffectivePermManager, RelatedPermManager
 
 
 class Perm(BasePerm):
 
     related_manager = RelatedPermManager()
 
-    class Meta:
+    class Meta(BasePerm.Meta):
         base_manager_name = 'related_manager'
+
+
+class EffectivePerm(models.Model):
+
+    # perms users hold directly or via their groups, maintained only when ``PERM_EFFECTIVE_PERMS`` is enabled
+
+    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='+')
+    perm = models.ForeignKey(perm_settings.PERM_MODEL, on_delete=models.CASCADE, related_name='+')
+    # the source of the perm, the group it is granted via or null if granted to the user directly
+    group = models.ForeignKey(Group, on_delete=models.CASCADE, null=True, blank=True, related_name='+')
+
+    objects = EffectivePermManager()
+
+    class Meta:
+        verbose_name = _('effective permission')
+        verbose_name_plural = _('effective permissions')
+        unique_together = (('user', 'perm', 'group'),)
+        constraints = [
+            # the group of direct grants is null, which is not unique in ``unique_together``
+            models.UniqueConstraint(
+                fields=['user', 'perm'],
+                condition=models.Q(group__isnull=True),
+                name='fperms_effectiveperm_direct_uniq',
+            ),
+        ]
@@ -0,0 +1,164 @@
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.core.signals import setting_changed
+from django.db.models import Model
+from django.db.models.signals import m2m_changed, post_save, post_delete, post_migrate
+from django.dispatch import Signal
+
+from fperms import get_perm_model
+from fperms.base import parse_perm
+from fperms.cache import clear_cached_perms, bump_generation, perm_codename_registry, perm_lru_cache
+from fperms.conf import settings
+
+
+M2M_CHANGED_ACTIONS = ('post_add', 'post_remove', 'post_clear')
+
+# sent by ``Perm.objects.grant`` and ``revoke`` once perms are granted to or revoked from users and groups in bulk
+# with ``action`` being 'grant' or 'revoke', and ``perms``, ``users`` and ``groups`` as passed, users and groups
+# either as instances or pks, ``grants`` are (user pk, perm pk) pairs if each user is granted only some of the perms,
+# e.g. by ``provision_object_perms``, None if all the perms are granted to all the users and groups
+perms_changed = Signal()
+
+
+def clear_perms_cache(sender, instance, action, reverse, **kwargs):
+    # drop the cached effective permissions of a user or group whose permissions have changed
+    if action not in M2M_CHANGED_ACTIONS:
+        return
+    if reverse:
+        clear_cached_perms(instance)
+    bump_generation()
+
+
+def clear_user_perms_cache(sender, instance, action, reverse, **kwargs):
+    # drop the cached effective permissions of a user whose group membership has changed
+    if action not in M2M_CHANGED_ACTIONS:
+        return
+    if not reverse:
+        clear_cached_perms(instance)
+    bump_generation()
+
+
+def _effective_perms(action):
+    # manager of the effective permissions to update for the m2m action, None if not maintained
+    # removals are handled before clearing, as the cleared pks are not known afterwards
+    if not settings.PERM_EFFECTIVE_PERMS or action not in ('post_add', 'post_remove', 'pre_clear'):
+        return None
+    return apps.get_model('fperms', 'EffectivePerm').objects
+
+
+def update_user_effective_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    # perms granted to or revoked from users directly
+    effective_perms = _effective_perms(action)
+    if effective_perms is None:
+        return
+    user_pks, perm_pks = ([instance.pk], pk_set) if reverse else (pk_set, [instance.pk])
+    if action == 'post_add':
+        effective_perms.grant_direct(user_pks, perm_pks)
+    elif action == 'post_remove':
+        effective_perms.revoke_direct(user_pks, perm_pks)
+    elif reverse:
+        effective_perms.revoke_direct(user_pks=user_pks)
+    else:
+        effective_perms.revoke_direct(perm_pks=perm_pks)
+
+
+def update_group_effective_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    # perms granted to or revoked from groups, and therefore from their members
+    effective_perms = _effective_perms(action)
+    if effective_perms is None:
+        return
+    group_pks, perm_pks = ([instance.pk], pk_set) if reverse else (pk_set, [instance.pk])
+    if action == 'post_add':
+        effective_perms.grant_group(group_pks, perm_pks)
+    elif action == 'post_remove':
+        effective_perms.revoke_group(group_pks, perm_pks)
+    elif reverse:
+        effective_perms.revoke_group(group_pks=group_pks)
+    else:
+        effective_perms.revoke_group(perm_pks=perm_pks)
+
+
+def update_membership_effective_perms(sender, instance, action, reverse, pk_set, **kwargs):
+    # users joining or leaving groups gain or lose the perms of the groups
+    effective_perms = _effective_perms(action)
+    if effective_perms is None:
+        return
+    user_pks, group_pks = (pk_set, [instance.pk]) if reverse else ([instance.pk], pk_set)
+    if action == 'post_add':
+        effective_perms.join_groups(user_pks, group_pks)
+    elif action == 'post_remove':
+        effective_perms.leave_groups(user_pks, group_pks)
+    elif reverse:
+        effective_perms.leave_groups(group_pks=group_pks)
+    else:
+        effective_perms.leave_groups(user_pks=user_pks)
+
+
+def update_changed_perms(sender, action, perms, users, groups, grants=None, **kwargs):
+    # handles perms changed in bulk the same way as perms changed via m2m relations
+    for instance in users + groups:
+        if isinstance(instance, Model):
+            clear_cached_perms(instance)
+    bump_generation()
+
+    if settings.PERM_EFFECTIVE_PERMS:
+        effective_perms = apps.get_model('fperms', 'EffectivePerm').objects
+        perm_pks = [perm.pk for perm in perms]
+        user_pks = [getattr(user, 'pk', user) for user in users]
+        group_pks = [getattr(group, 'pk', group) for group in groups]
+        if action == 'grant' and grants is not None:
+            effective_perms.grant_direct_pairs(grants)
+        elif action == 'grant':
+            effective_perms.grant_direct(user_pks, perm_pks)
+            effective_perms.grant_group(group_pks, perm_pks)
+        else:
+            effective_perms.revoke_direct(user_pks, perm_pks)
+            effective_perms.revoke_group(group_pks, perm_pks)
+
+
+def invalidate_shared_cache(sender, **kwargs):
+    bump_generation()
+
+
+def evict_perm(sender, instance, **kwargs):
+    # perms resolved in other processes are dropped once the generation of the perms changes,
+    # the generation of the shared cache is bumped as well, as deleted perms are no longer held
+    perm_lru_cache.evict(instance)
+    perm_codename_registry.evict([instance])
+    bump_generation()
+
+
+def clear_parse_cache(sender, **kwargs):
+    # parsed and resolved perms refer to models and pks, which change when apps or the database are reloaded
+    parse_perm.cache_clear()
+    perm_lru_cache.clear()
+    perm_codename_registry.clear()
+
+
+def clear_parse_cache_on_setting_changed(sender, setting, **kwargs):
+    if setting in ('INSTALLED_APPS', 'PERM_MODEL', 'PERM_PARSE_CACHE_SIZE'):
+        parse_perm.cache_clear()
+        perm_lru_cache.clear()
+        perm_codename_registry.clear()
+
+
+def connect_signals():
+    perm_model = get_perm_model()
+    m2m_changed.connect(clear_perms_cache, sender=perm_model.users.through)
+    m2m_changed.connect(clear_perms_cache, sender=perm_model.groups.through)
+    m2m_changed.connect(update_user_effective_perms, sender=perm_model.users.through)
+    m2m_changed.connect(update_group_effective_perms, sender=perm_model.groups.through)
+    perms_changed.connect(update_changed_perms, sender=perm_model)
+    post_save.connect(evict_perm, sender=perm_model)
+    post_delete.connect(evict_perm, sender=perm_model)
+    # deleting a group removes its memberships without sending m2m_changed
+    post_delete.connect(invalidate_shared_cache, sender=Group)
+
+    post_migrate.connect(clear_parse_cache)
+    setting_changed.connect(clear_parse_cache_on_setting_changed)
+
+    user_model = get_user_model()
+    if hasattr(user_model, 'groups'):
+        m2m_changed.connect(clear_user_perms_cache, sender=user_model.groups.through)
+        m2m_changed.connect(update_membership_effective_perms, sender=user_model.groups.through)
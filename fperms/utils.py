@@ -1,13 +1,124 @@
 from django.contrib.contenttypes.models import ContentType
+from django.db.models import Q
 from fperms.conf import settings
 
 from fperms import get_perm_model, enums
+from fperms.cache import PERM_NOT_CACHED, perm_lru_cache
+from fperms.instrumentation import (
+    EVENT_DOES_NOT_EXIST, EVENT_PREFETCH_HIT, EVENT_WILDCARD_FALLBACK, instrumented, record,
+)
+
+
+try:
+    from django.core.exceptions import SynchronousOnlyOperation
+except ImportError:
+    # django < 3.0 does not prevent queries in async context
+    class SynchronousOnlyOperation(Exception):
+        pass
+
+
+PREFETCHED_PERMS_ATTR = '_fperms_prefetched_perms'
 
 
 def get_content_type(obj):
     return ContentType.objects.get_for_model(obj)
 
 
+def prefetch_perms(user, objects, codenames=None):
+    # load object permissions of all the objects in a single query and attach them to each object
+    # subsequent object permission checks for these objects do not need to query the perm table
+    # the objects may be of different models, the effective permissions of the user are loaded as well,
+    # unless already cached
+    objects = [obj for obj in objects if obj.pk is not None]
+    if not objects:
+        return objects
+
+    perm_model = get_perm_model()
+    object_keys = [(get_content_type(obj).pk, perm_model.get_object_id(obj)) for obj in objects]
+    object_ids_by_content_type = {}
+    for content_type_id, object_id in object_keys:
+        object_ids_by_content_type.setdefault(content_type_id, []).append(object_id)
+    objects_query = Q()
+    for content_type_id, object_ids in object_ids_by_content_type.items():
+        objects_query |= Q(content_type_id=content_type_id, object_id__in=object_ids)
+
+    perms = perm_model.objects.filter(objects_query, type=enums.PERM_TYPE_OBJECT)
+    if codenames is not None:
+        codenames = frozenset(codenames)
+        perms = perms.filter(codename__in=codenames | {enums.PERM_CODENAME_WILDCARD})
+
+    object_perms = {object_key: {} for object_key in object_keys}
+    for perm in perms:
+        object_perms[perm.content_type_id, perm.object_id][perm.perm_key] = perm
+    for obj, object_key in zip(objects, object_keys):
+        setattr(obj, PREFETCHED_PERMS_ATTR, (codenames, object_perms[object_key]))
+
+    if user is not None and user.pk is not None:
+        # load and cache the effective permissions of the user
+        user.perms.perm_keys()
+
+    return objects
+
+
+def get_prefetched_perms(obj, codename):
+    # get object permissions prefetched for the object if they cover the codename, None otherwise
+    prefetched = getattr(obj, PREFETCHED_PERMS_ATTR, None)
+    if prefetched is None:
+        return None
+    codenames, perms = prefetched
+    if codenames is not None and codename not in codenames:
+        return None
+    return perms
+
+
+def get_resolve_kwargs(perm_kwargs):
+    # filter kwargs matching both the perm and its wildcard perm
+    resolve_kwargs = dict(perm_kwargs, codename__in=(perm_kwargs['codename'], enums.PERM_CODENAME_WILDCARD))
+    del resolve_kwargs['codename']
+    return resolve_kwargs
+
+
+def select_perm(perm_model, perm_kwargs, perms):
+    # select the perm resolved from perm kwargs out of perms matching the resolve kwargs mapped by their codename
+    # the perm itself takes precedence, its wildcard perm is used only if the perm does not exist
+    perm = perms.get(perm_kwargs['codename'])
+    if perm is None and settings.PERM_AUTO_CREATE:
+        # create the required perm if it doesn't exist and is supposed to be created
+        perm = perm_model.objects.create(**perm_kwargs)
+    if perm is None:
+        perm = perms.get(enums.PERM_CODENAME_WILDCARD)
+    return perm
+
+
+def get_cached_perm(perm_kwargs, obj=None):
+    # get the perm resolved from perm kwargs if it is prefetched or cached, ``PERM_NOT_CACHED`` otherwise
+    # None is returned for prefetched perms known not to exist
+    perm_model = get_perm_model()
+    perm_key = perm_model.get_perm_kwargs_key(perm_kwargs)
+
+    prefetched_perms = None
+    if perm_kwargs['object_id'] is not None:
+        prefetched_perms = get_prefetched_perms(obj, perm_kwargs['codename'])
+    if prefetched_perms is not None:
+        record(EVENT_PREFETCH_HIT)
+        if perm_key in prefetched_perms:
+            return prefetched_perms[perm_key]
+        if not settings.PERM_AUTO_CREATE:
+            wildcard_key = (perm_key[0], enums.PERM_CODENAME_WILDCARD) + perm_key[2:]
+            return prefetched_perms.get(wildcard_key)
+
+    return perm_lru_cache.get(perm_key)
+
+
+def record_resolved_perm(perm_kwargs, perm):
+    # record perms resolved to their wildcard perm and perms which do not exist for instrumented checks
+    if perm is None:
+        record(EVENT_DOES_NOT_EXIST)
+    elif perm.codename != perm_kwargs['codename']:
+        record(EVENT_WILDCARD_FALLBACK)
+
+
+@instrumented('get_perm')
 def get_perm(perm, obj=None):
     perm_model = get_perm_model()
 
@@ -16,15 +127,23 @@ def get_perm(perm, obj=None):
 
     perm_kwargs = perm_model.get_perm_kwargs(perm, obj)
 
-    try:
-        perm = perm_model.objects.get(**perm_kwargs)
-    except perm_model.DoesNotExist:
-        if settings.PERM_AUTO_CREATE:
-            # create the required perm if it doesn't exist and is supposed to be created
-            perm = perm_model.objects.create(**perm_kwargs)
-        else:
-            # check if a wildcard permission exists instead
-            perm_kwargs['codename'] = enums.PERM_CODENAME_WILDCARD
-            perm = perm_model.objects.get(**perm_kwargs)
+    # resolved perms are cached in process, the cache is evicted whenever a perm is saved or deleted
+    perm = get_cached_perm(perm_kwargs, obj)
+    if perm is PERM_NOT_CACHED:
+        perms = perm_model.objects.filter(**get_resolve_kwargs(perm_kwargs))
+        perm = select_perm(perm_model, perm_kwargs, {perm.codename: perm for perm in perms})
+        perm_lru_cache.set(perm_model.get_perm_kwargs_key(perm_kwargs), perm)
 
+    record_resolved_perm(perm_kwargs, perm)
+    if perm is None:
+        raise perm_model.DoesNotExist('{} matching query does not exist.'.format(perm_model._meta.object_name))
     return perm
+
+
+async def run_sync(func, *args, **kwargs):
+    # run a function querying the database from async code, in the thread shared by all such functions
+    # the thread sensitive executor runs them one at a time, so checks are answered from memory where possible
+    # async permission checks require django 3.0 or later
+    from asgiref.sync import sync_to_async
+
+    return await sync_to_async(func)(*args, **kwargs)